@@ -0,0 +1,19 @@
+# =========================================================================
+# atm_data: AKSES DATA BERSAMA UNTUK dashboard_atm.py & dashboard_klien.py
+# =========================================================================
+# Satu loader (Google Sheets -> snapshot parquet -> Excel backup), satu schema bersih
+# (BULAN_EN, TID, kolom kategori) dan satu store snapshot per proses.
+# Sumber data dipilih lewat ATM_DATA_SOURCE (lihat config.py): gsheets, fixture, excel, parquet, csv, sqlite.
+# Banyak replika: ATM_SHARED_DIR -> satu penulis memuat dari Google, replika lain memory-map (shared_cache.py).
+from .config import (SHEET_URL, SHEET_MAIN, SHEET_SLM, SHEET_MRI, SHEET_MONITORING, SHEET_SP, SHEET_BLOCKS,
+                     KASET_HEADERS, APP_DIR, JSON_FILE, SNAPSHOT_DIR, SHARED_DIR, BACKUP_FILE, REFRESH_INTERVAL_SEC, REFRESH_RETRY_SEC,
+                     DATA_SOURCE, DATA_PATH, FIXTURE)
+from .schema import clean_master, apply_master_schema, concat_master, plain_keys, frame_mem_bytes, format_slm, MASTER_CATEGORY_COLS, WEEK_NUM_MAP
+from .sheets import credentials_available, get_gspread_client, connect, get_master_sync_state
+from .loader import load_data, empty_data
+from .sources import LOCAL_SOURCES, book_from_path, export_book, data_from_book
+from .fixture import FixtureClient, generate_book, get_fixture_client
+from .disk_cache import save_parquet_snapshot, load_parquet_snapshot
+from .store import get_data_store, get_snapshot
+from .singleflight import single_flight
+from . import profiling
@@ -0,0 +1,90 @@
+import os
+
+# =========================================================================
+# KONFIGURASI SUMBER DATA (DIPAKAI BERSAMA dashboard_atm.py & dashboard_klien.py)
+# =========================================================================
+SHEET_URL = "https://docs.google.com/spreadsheets/d/1pApEIA9BEYEojW4a6Fvwykkf-z-UqeQ8u2pmrqQc340/edit"
+SHEET_MAIN = 'AIMS_Master'
+SHEET_SLM = 'SLM Visit Log'
+SHEET_MRI = 'Data_Form'
+SHEET_MONITORING = 'Summary Monitoring Cash'
+SHEET_SP = 'Sparepart&kaset'
+
+# --- PETA BLOK RANGE (HANYA AREA YANG DIPAKAI HALAMAN SPAREPART & FOLLOW-UP) ---
+# nama_blok: (sheet, range A1, mode header)
+#   'unique'  : baris pertama jadi header (kosong -> "Info", duplikat diberi suffix _n)
+#   'kaset'   : header manual KASET_HEADERS, baris pertama dibuang, baris non-cabang disaring
+#   'monitor' : baris pertama jadi header (gaya tabel Summary Monitoring Cash)
+SHEET_BLOCKS = {
+    'sp_stock':    (SHEET_SP, 'A1:V10', 'unique'),
+    'sp_kaset':    (SHEET_SP, 'A12:L22', 'kaset'),
+    'sp_rusak':    (SHEET_SP, 'A24:F27', 'unique'),
+    'sp_pm':       (SHEET_SP, 'A32:G39', 'unique'),
+    'fu_elastic':  (SHEET_MONITORING, 'U3:Y7', 'monitor'),
+    'fu_complain': (SHEET_MONITORING, 'U17:Y20', 'monitor'),
+}
+KASET_HEADERS = ["CABANG", "JML TID", "NOV GOOD CURRENT", "NOV GOOD REJECT", "W1 DEC GOOD CURRENT", "W1 DEC GOOD REJECT", "W2 DEC GOOD REJECT", "W2 DEC GOOD CURRENT", "W3 DEC GOOD CURRENT", "W3 DEC GOOD REJECT", "W4 DEC GOOD CURRENT", "W4 DEC GOOD REJECT"]
+
+# --- SUMBER DATA (DIPILIH LEWAT ENVIRONMENT) ---
+# ATM_DATA_SOURCE: gsheets (default, produksi) | fixture (tiruan Google Sheets lokal) |
+#                  excel | parquet | csv | sqlite (file lokal, tanpa koneksi)
+# ATM_DATA_PATH  : file / folder untuk sumber lokal (parquet default: folder snapshot produksi)
+DATA_SOURCE = os.environ.get('ATM_DATA_SOURCE', 'gsheets').strip().lower()
+DATA_PATH = os.environ.get('ATM_DATA_PATH', '').strip()
+
+# --- FIXTURE (LOAD TEST / BENCHMARK TANPA SPREADSHEET PRODUKSI) ---
+# rows     : jumlah baris master awal (dibangkitkan, kecuali ATM_DATA_PATH menunjuk workbook)
+# growth   : baris baru yang "diinput" ke master setiap kali master dibaca
+# latency  : detik per panggilan API ; quota_rate / error_rate : peluang 429 / 500 per panggilan
+# missing  : sheet yang dianggap tidak ada (koma), mis. "SLM Visit Log,Data_Form"
+FIXTURE = {
+    'rows': int(os.environ.get('ATM_FIXTURE_ROWS', '5000')),
+    'growth': int(os.environ.get('ATM_FIXTURE_GROWTH', '0')),
+    'latency': float(os.environ.get('ATM_FIXTURE_LATENCY', '0')),
+    'quota_rate': float(os.environ.get('ATM_FIXTURE_QUOTA_RATE', '0')),
+    'error_rate': float(os.environ.get('ATM_FIXTURE_ERROR_RATE', '0')),
+    'missing': [t.strip() for t in os.environ.get('ATM_FIXTURE_MISSING', '').split(',') if t.strip()],
+    'seed': int(os.environ.get('ATM_FIXTURE_SEED', '0')),
+}
+
+# --- LOKASI FILE (RELATIF KE FOLDER APLIKASI, BUKAN CWD) ---
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JSON_FILE = os.path.join(APP_DIR, "credentials.json")
+PROD_SNAPSHOT_DIR = os.path.join(APP_DIR, 'snapshot')
+# Sumber non-produksi menyimpan snapshot terpisah (snapshot.<sumber>) supaya tidak tercampur
+SNAPSHOT_DIR = PROD_SNAPSHOT_DIR if DATA_SOURCE == 'gsheets' else f"{PROD_SNAPSHOT_DIR}.{DATA_SOURCE}"
+SNAPSHOT_MANIFEST = 'manifest.json'
+# Folder versi snapshot lokal: SNAPSHOT_KEEP_VERSIONS terbaru disimpan, versi lain baru dihapus
+# setelah berumur SNAPSHOT_PRUNE_AGE_SEC (pembaca yang masih membaca versi sebelumnya tetap aman)
+SNAPSHOT_KEEP_VERSIONS = 2
+SNAPSHOT_PRUNE_AGE_SEC = 300
+# File Backup Lokal (dipakai hanya jika snapshot parquet belum pernah dibuat)
+BACKUP_FILE = 'DATA_MASTER_ATM.xlsx'
+
+# --- JADWAL REFRESH (SATU STORE UNTUK KEDUA DASHBOARD) ---
+# Interval mengikuti kebutuhan paling ketat (monitoring ATM); sinkron master incremental
+# membuat refresh rutin cukup murah.
+REFRESH_INTERVAL_SEC = 600
+REFRESH_RETRY_SEC = 120
+MASTER_FULL_RESYNC_SEC = 24 * 3600
+
+# --- CACHE BERSAMA ANTAR REPLIKA (OPT-IN, POSIX: BUTUH flock) ---
+# ATM_SHARED_DIR : folder yang dipakai bersama semua replika di belakang load balancer
+#                  (disk lokal / volume bersama yang mendukung flock). Satu replika (penulis)
+#                  memuat dari Google & menulis versi Arrow, replika lain cukup memory-map.
+# ATM_SHARED_ROLE: auto (default: pemegang writer.lock jadi penulis; penulis mati -> replika lain
+#                  mengambil alih) | reader (tidak pernah jadi penulis). Untuk satu refresher yang
+#                  ditunjuk: auto di replika itu, reader di semua replika lain.
+SHARED_DIR = os.environ.get('ATM_SHARED_DIR', '').strip()
+# Sumber non-produksi -> folder terpisah, sama seperti SNAPSHOT_DIR
+if SHARED_DIR and DATA_SOURCE != 'gsheets': SHARED_DIR = f"{SHARED_DIR.rstrip(os.sep)}.{DATA_SOURCE}"
+SHARED_ROLE = os.environ.get('ATM_SHARED_ROLE', 'auto').strip().lower()
+SHARED_POLL_SEC = 15       # pembaca cek versi baru / lock penulis kosong
+SHARED_WAIT_SEC = 60       # cold start pembaca menunggu versi pertama sebelum memuat sendiri
+SHARED_KEEP_VERSIONS = 3   # versi lama yang disimpan (pembaca yang masih membuka versi sebelumnya)
+
+# --- METRICS PROMETHEUS (OPT-IN) ---
+# ATM_METRICS_PORT > 0 -> endpoint teks Prometheus di http://ATM_METRICS_HOST:port/metrics
+# (thread samping, satu per proses). Tiap proses Streamlit butuh port sendiri.
+METRICS_PORT = int(os.environ.get('ATM_METRICS_PORT', '0') or 0)
+METRICS_HOST = os.environ.get('ATM_METRICS_HOST', '127.0.0.1').strip()
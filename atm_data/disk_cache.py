@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import shutil
+import pandas as pd
+import pyarrow as pa
+
+from .config import SNAPSHOT_DIR, SNAPSHOT_MANIFEST, SNAPSHOT_KEEP_VERSIONS, SNAPSHOT_PRUNE_AGE_SEC
+from .schema import apply_master_schema
+from .sheets import get_master_sync_state
+
+# =========================================================================
+# SNAPSHOT PARQUET LOKAL (WARM START & OFFLINE)
+# =========================================================================
+# Setiap load ONLINE yang sukses disimpan sebagai frame yang sudah bersih & bertipe:
+# satu file parquet per sheet/blok + manifest.json (waktu load, jumlah baris, kolom,
+# state sinkron master). Restart proses & jalur offline cukup baca parquet (milidetik),
+# tidak perlu parse Excel ulang atau download penuh dari Google.
+# Tata letak berversi (dipakai bersama kedua dashboard / beberapa proses):
+#   SNAPSHOT_DIR/manifest.json  : penunjuk versi aktif {'dir', 'loaded_at', 'status'}, ditukar atomik
+#   SNAPSHOT_DIR/v<ms>-<pid>/   : manifest per frame + file parquet, tidak pernah diubah setelah jadi
+# Pembaca tidak butuh kunci & tidak pernah melihat folder kosong / setengah jadi; penulis bersamaan
+# menulis folder masing-masing. Folder snapshot lama (datar, tanpa versi) tetap terbaca.
+# Format 'arrow' (Arrow IPC tanpa kompresi) dipakai cache bersama antar replika (shared_cache.py):
+# file dibuka lewat memory-map, buffer kolom dibagi page cache OS (bukan salinan per proses).
+def snapshot_frames(data):
+    df, df_slm, df_mri_ops, sheet_blocks, _ = data
+    frames = {'master': df, 'slm': df_slm, 'mri_ops': df_mri_ops}
+    frames.update({f"block__{k}": v for k, v in sheet_blocks.items()})
+    return frames
+
+def positional(df_in):
+    # Nama kolom sheet bisa kosong/duplikat -> simpan posisional, nama asli di manifest
+    out = df_in.reset_index(drop=True)
+    out.columns = [f"c{i}" for i in range(out.shape[1])]
+    return out
+
+def stringify_objects(out):
+    # Kolom object campuran (mis. str + angka) -> paksa string
+    obj_cols = out.select_dtypes(include='object').columns
+    out[obj_cols] = out[obj_cols].astype(str)
+    return out
+
+def write_parquet(df_in, path):
+    out = positional(df_in)
+    try:
+        out.to_parquet(path, index=False)
+    except Exception:
+        stringify_objects(out).to_parquet(path, index=False)
+
+def write_arrow(df_in, path):
+    out = positional(df_in)
+    try:
+        table = pa.Table.from_pandas(out, preserve_index=False)
+    except Exception:
+        table = pa.Table.from_pandas(stringify_objects(out), preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+def read_arrow(path):
+    # Zero-copy: angka, datetime, string (pyarrow) & kode kategori menunjuk langsung ke file yang di-map
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True)
+
+# format -> (ekstensi, penulis, pembaca)
+SNAPSHOT_FORMATS = {
+    'parquet': ('.parquet', write_parquet, pd.read_parquet),
+    'arrow': ('.arrow', write_arrow, read_arrow),
+}
+
+def write_snapshot_dir(data, loaded_at, out_dir, fmt='parquet'):
+    # Satu file per frame + manifest.json di out_dir (folder dibuat baru) -> manifest
+    ext, writer, _ = SNAPSHOT_FORMATS[fmt]
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+    manifest = {'loaded_at': loaded_at, 'status': data[-1], 'format': fmt, 'frames': {}}
+    for name, frame in snapshot_frames(data).items():
+        entry = {'rows': int(len(frame)), 'columns': [str(c) for c in frame.columns], 'file': None, 'attrs': dict(frame.attrs)}
+        if frame.shape[1] > 0:
+            entry['file'] = f"{name}{ext}"
+            writer(frame, os.path.join(out_dir, entry['file']))
+        manifest['frames'][name] = entry
+
+    sync = get_master_sync_state()
+    if sync['df'] is not None:
+        manifest['master_sync'] = {k: sync[k] for k in ('header', 'header_hash', 'row_count', 'last_row', 'full_at')}
+
+    with open(os.path.join(out_dir, SNAPSHOT_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    return manifest
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def write_json_atomic(path, obj):
+    # tmp + os.replace: pembaca melihat isi lama atau baru utuh, tidak pernah setengah tertulis
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def prune_snapshots(snapshot_dir, current):
+    # Versi aktif & SNAPSHOT_KEEP_VERSIONS terbaru disimpan, versi lain dihapus setelah cukup tua;
+    # file parquet tata letak lama (datar) & sisa .tmp penulis yang mati ikut dibersihkan.
+    # Penulis lain bisa sedang prune juga -> entri yang sudah hilang dilewati
+    names = os.listdir(snapshot_dir)
+    versions = sorted(n for n in names if n.startswith('v'))
+    keep = set(versions[-SNAPSHOT_KEEP_VERSIONS:]) | {current}
+    for name in names:
+        path = os.path.join(snapshot_dir, name)
+        try:
+            if name.endswith('.parquet'): os.remove(path)
+            elif (name in versions and name not in keep) or name.startswith('.v'):
+                if time.time() - os.path.getmtime(path) > SNAPSHOT_PRUNE_AGE_SEC: shutil.rmtree(path, ignore_errors=True)
+        except OSError: pass
+
+def save_parquet_snapshot(data, loaded_at):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    name = f"v{int(loaded_at * 1000)}-{os.getpid()}"
+    tmp_dir = os.path.join(SNAPSHOT_DIR, f".{name}.tmp")
+    try:
+        write_snapshot_dir(data, loaded_at, tmp_dir)
+        os.replace(tmp_dir, os.path.join(SNAPSHOT_DIR, name))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    pointer = os.path.join(SNAPSHOT_DIR, SNAPSHOT_MANIFEST)
+    try: current = read_json(pointer)
+    except Exception: current = {}
+    # Penulis lain sudah menunjuk versi yang lebih baru -> jangan mundur
+    if current.get('dir') and current.get('loaded_at', 0) > loaded_at: name = current['dir']
+    else: write_json_atomic(pointer, {'dir': name, 'loaded_at': loaded_at, 'status': data[-1]})
+    prune_snapshots(SNAPSHOT_DIR, name)
+
+def load_parquet_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    # -> (data tuple, manifest) atau None jika belum ada snapshot. Folder versi cache bersama
+    # (format arrow) dibaca lewat fungsi yang sama -> memory-map. Versi terhapus di tengah baca
+    # (penulis lain sudah 2x publish) -> ulang sekali dari penunjuk terbaru
+    for _ in range(2):
+        try: manifest = read_json(os.path.join(snapshot_dir, SNAPSHOT_MANIFEST))
+        except Exception: return None
+        version_dir = os.path.join(snapshot_dir, manifest['dir']) if 'dir' in manifest else snapshot_dir
+        cached = read_snapshot_dir(version_dir)
+        if cached is not None: return cached
+    return None
+
+def read_snapshot_dir(snapshot_dir):
+    try:
+        manifest = read_json(os.path.join(snapshot_dir, SNAPSHOT_MANIFEST))
+        reader = SNAPSHOT_FORMATS[manifest.get('format', 'parquet')][2]
+        frames = {}
+        for name, entry in manifest['frames'].items():
+            if entry['file']:
+                frame = reader(os.path.join(snapshot_dir, entry['file']))
+                frame.columns = entry['columns']
+                if name == 'master': frame = apply_master_schema(frame)
+                frame.attrs.update(entry.get('attrs', {}))
+            else:
+                frame = pd.DataFrame()
+            frames[name] = frame
+        blocks = {k[len('block__'):]: v for k, v in frames.items() if k.startswith('block__')}
+        data = (frames['master'], frames['slm'], frames['mri_ops'], blocks, manifest['status'])
+        return data, manifest
+    except Exception:
+        return None
+
+def seed_master_sync(manifest, df_master):
+    # Warm start: lanjutkan sinkron incremental dari snapshot, bukan full download
+    meta = manifest.get('master_sync')
+    state = get_master_sync_state()
+    if not meta or df_master.empty: return
+    with state['lock']:
+        if state['df'] is None:
+            state.update(meta)
+            state['df'] = df_master
@@ -0,0 +1,185 @@
+import re
+import json
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+import gspread
+
+from .config import SHEET_MAIN, SHEET_SLM, SHEET_MRI, SHEET_MONITORING, SHEET_SP, DATA_PATH, FIXTURE
+from .sources import book_from_path
+
+# =========================================================================
+# FIXTURE: TIRUAN GOOGLE SHEETS LOKAL (LOAD TEST & BENCHMARK)
+# =========================================================================
+# FixtureClient meniru permukaan gspread yang dipakai loader (open_by_url, worksheets,
+# values_batch_get, batch_get, get_all_values), jadi jalur ONLINE yang sama (batch fetch,
+# sinkron incremental master) bisa diuji tanpa spreadsheet produksi. Latency, error quota
+# (429), error server (500), sheet hilang & pertumbuhan master bisa diatur (lihat FIXTURE).
+# Workbook = {judul_sheet: grid baris x kolom (string)}.
+CATEGORIES = ['Elastic', 'Complain', 'DF Repeat', 'OUT Flm', 'Cash Out']
+COMPLAINT_DIST = {'1': 3, '2': 1, '3': 1, '-': 1}  # nilai JUMLAH_COMPLAIN -> bobot
+MASTER_HEADER = ['TANGGAL', 'BULAN', 'WEEK', 'TID', 'LOKASI', 'CABANG', 'KATEGORI', 'JUMLAH_COMPLAIN', 'STATUS MRI', 'TYPE MRI', 'WAKTU INSERT']
+
+# --- WORKBOOK SINTETIS (TANGGAL RELATIF KE HARI INI, DETERMINISTIK PER SEED) ---
+def tid_pool(n_rows, n_tids=None):
+    return [f"T{10000 + i}" for i in range(n_tids or max(50, n_rows // 20))]
+
+def month_start(day, back=0):
+    y, m = divmod(day.year * 12 + day.month - 1 - back, 12)
+    return datetime(y, m + 1, 1)
+
+def master_row(rng, tids, day, branches=24, categories=CATEGORIES, complaints=COMPLAINT_DIST):
+    # Satu baris (dipakai pertumbuhan master di FixtureClient)
+    tid = rng.choice(tids)
+    num = int(tid[1:])
+    week = 'W1' if day.day <= 7 else 'W2' if day.day <= 14 else 'W3' if day.day <= 21 else 'W4'
+    return [day.strftime('%Y-%m-%d'), day.strftime('%B'), week, tid, f"LOKASI {tid}", f"CABANG {num % branches:02d}",
+            rng.choice(categories), rng.choices(list(complaints), weights=list(complaints.values()))[0], 'TID MRI' if num % 9 == 0 else '',
+            'A' if num % 2 else 'B', day.strftime('%Y-%m-%d %H:%M')]
+
+def master_rows(rng, tids, n, start, end, branches=24, categories=CATEGORIES, complaints=COMPLAINT_DIST):
+    # Vektor numpy (1 juta baris tetap cepat); sheet master append-only: baris urut tanggal naik
+    gen = np.random.default_rng(rng.randrange(2 ** 32))
+    span = max(1, (end - start).days)
+    days = pd.DatetimeIndex(pd.Timestamp(start.date()) + pd.to_timedelta(np.sort(gen.integers(0, span + 1, n)), unit='D'))
+    tid = pd.Series(np.asarray(tids, dtype=object)[gen.integers(0, len(tids), n)])
+    num = tid.str[1:].astype(int)
+    week = np.select([days.day <= 7, days.day <= 14, days.day <= 21], ['W1', 'W2', 'W3'], 'W4')
+    weights = np.asarray(list(complaints.values()), dtype=float)
+    date_str = pd.Series(days.strftime('%Y-%m-%d'))
+    clock = pd.Series(gen.integers(7, 21, n)).astype(str).str.zfill(2) + ':' + pd.Series(gen.integers(0, 60, n)).astype(str).str.zfill(2)
+    frame = pd.DataFrame({
+        'TANGGAL': date_str, 'BULAN': days.strftime('%B'), 'WEEK': week, 'TID': tid, 'LOKASI': 'LOKASI ' + tid,
+        'CABANG': 'CABANG ' + (num % branches).astype(str).str.zfill(2),
+        'KATEGORI': np.asarray(categories, dtype=object)[gen.integers(0, len(categories), n)],
+        'JUMLAH_COMPLAIN': np.asarray(list(complaints), dtype=object)[gen.choice(len(weights), n, p=weights / weights.sum())],
+        'STATUS MRI': np.where(num % 9 == 0, 'TID MRI', ''), 'TYPE MRI': np.where(num % 2, 'A', 'B'),
+        'WAKTU INSERT': date_str + ' ' + clock,
+    }).astype(object)
+    return frame.values.tolist()
+
+def grid_block(rows, cols, tag):
+    return [[f"{tag}{r}_{c}" if c else f"CABANG {r:02d}" for c in range(cols)] for r in range(rows)]
+
+def generate_book(rows=5000, seed=0, today=None, tids=None, branches=24, months=4, categories=CATEGORIES, complaints=COMPLAINT_DIST):
+    # months = jumlah bulan kalender yang dicakup (termasuk bulan berjalan); tids None -> rows // 20
+    rng = random.Random(seed)
+    today = today or datetime.now()
+    start = month_start(today, max(1, months) - 1)
+    tids = tid_pool(rows, tids)
+    master = [MASTER_HEADER] + master_rows(rng, tids, rows, start, today, branches, categories, complaints)
+    slm = [['TID', 'TANGGAL VISIT', 'ACTION']] + [
+        [rng.choice(tids), (start + timedelta(days=rng.randrange((today - start).days + 1))).strftime('%Y-%m-%d'), rng.choice(['ganti part', 'cleaning', 'reset', 'cek jaringan'])]
+        for _ in range(max(10, rows // 10))]
+    mri = [['TID', 'Range Waktu Visit']] + [[rng.choice(tids), rng.choice(['Pagi', 'Siang', 'Malam'])] for _ in range(max(10, rows // 50))]
+    monitoring = [['' if c < 20 else f"m{r}_{c}" for c in range(26)] for r in range(22)]
+    return {SHEET_MAIN: master, SHEET_SLM: slm, SHEET_MRI: mri, SHEET_MONITORING: monitoring, SHEET_SP: grid_block(40, 22, 'sp')}
+
+# --- RANGE A1 -> POTONGAN GRID (MENIRU VALUES API: SEL KOSONG DI UJUNG DIPOTONG) ---
+def slice_grid(grid, rng=None):
+    if rng:
+        g = gspread.utils.a1_range_to_grid_range(rng)
+        r0, r1 = g.get('startRowIndex', 0), g.get('endRowIndex', len(grid))
+        c0, c1 = g.get('startColumnIndex', 0), g.get('endColumnIndex', None)
+    else:
+        r0, r1, c0, c1 = 0, len(grid), 0, None
+    out = [list(r[c0:c1]) for r in grid[r0:r1]]
+    out = [r[:max([i + 1 for i, x in enumerate(r) if x != ''] or [0])] for r in out]
+    while out and not out[-1]: out.pop()
+    return out
+
+def api_error(code, message, status):
+    resp = requests.Response()
+    resp.status_code = code
+    resp._content = json.dumps({'error': {'code': code, 'message': message, 'status': status}}).encode('utf-8')
+    return gspread.exceptions.APIError(resp)
+
+class FixtureClient:
+    def __init__(self, book, opts=None):
+        self.book = book
+        self.opts = {**FIXTURE, **(opts or {})}
+        self.rng = random.Random(self.opts['seed'])
+        self.tids = tid_pool(len(book.get(SHEET_MAIN, [])))
+        self.lock = threading.Lock()
+        self.stats = {'calls': 0, 'quota_errors': 0, 'server_errors': 0, 'rows_added': 0}
+
+    def api_call(self):
+        # Satu request HTTP tiruan: latency + peluang error quota / server
+        with self.lock:
+            self.stats['calls'] += 1
+            roll = self.rng.random()
+        if self.opts['latency']: time.sleep(self.opts['latency'])
+        if roll < self.opts['quota_rate']:
+            self.stats['quota_errors'] += 1
+            raise api_error(429, "Quota exceeded for quota metric 'Read requests' (fixture)", 'RESOURCE_EXHAUSTED')
+        if roll < self.opts['quota_rate'] + self.opts['error_rate']:
+            self.stats['server_errors'] += 1
+            raise api_error(500, 'Internal error encountered (fixture)', 'INTERNAL')
+
+    def sheet(self, title):
+        if title not in self.book or title in self.opts['missing']: raise gspread.exceptions.WorksheetNotFound(title)
+        return self.book[title]
+
+    def grow(self):
+        # Simulasi input harian: baris baru selalu di bawah (append-only), sekali per request yang membaca master
+        n = self.opts['growth']
+        if n <= 0: return
+        with self.lock:
+            now = datetime.now()
+            self.book[SHEET_MAIN].extend(master_row(self.rng, self.tids, now) for _ in range(n))
+            self.stats['rows_added'] += n
+
+    def open_by_url(self, url):
+        self.api_call()
+        return FixtureSpreadsheet(self)
+
+class FixtureSpreadsheet:
+    def __init__(self, client): self.client = client
+
+    def worksheets(self):
+        self.client.api_call()
+        return [FixtureWorksheet(self.client, t) for t in self.client.book if t not in self.client.opts['missing']]
+
+    def worksheet(self, title):
+        self.client.api_call()
+        self.client.sheet(title)
+        return FixtureWorksheet(self.client, title)
+
+    def values_batch_get(self, ranges, params=None):
+        self.client.api_call()
+        if any(r.startswith(gspread.utils.absolute_range_name(SHEET_MAIN)) for r in ranges): self.client.grow()
+        out = []
+        for r in ranges:
+            m = re.match(r"^'((?:[^']|'')*)'(?:!(.*))?$", r)
+            if not m: raise api_error(400, f"Unable to parse range: {r}", 'INVALID_ARGUMENT')
+            try: grid = self.client.sheet(m.group(1).replace("''", "'"))
+            except gspread.exceptions.WorksheetNotFound: raise api_error(400, f"Unable to parse range: {r}", 'INVALID_ARGUMENT')
+            vals = slice_grid(grid, m.group(2))
+            out.append({'range': r, **({'values': vals} if vals else {})})
+        return {'valueRanges': out}
+
+class FixtureWorksheet:
+    def __init__(self, client, title): self.client, self.title = client, title
+
+    def get_all_values(self):
+        self.client.api_call()
+        if self.title == SHEET_MAIN: self.client.grow()
+        return [list(r) for r in self.client.sheet(self.title)]
+
+    def batch_get(self, ranges):
+        self.client.api_call()
+        if self.title == SHEET_MAIN: self.client.grow()
+        grid = self.client.sheet(self.title)
+        return [slice_grid(grid, r) for r in ranges]
+
+@st.cache_resource(show_spinner=False)
+def get_fixture_client():
+    # Satu fixture per proses (pertumbuhan master berlanjut antar refresh).
+    # ATM_DATA_PATH -> workbook awal dari file (xlsx / folder csv / sqlite), selain itu sintetis.
+    book = book_from_path(DATA_PATH) if DATA_PATH else generate_book(FIXTURE['rows'], FIXTURE['seed'])
+    return FixtureClient(book)
@@ -0,0 +1,103 @@
+import os
+import pandas as pd
+import gspread
+
+from .config import SHEET_URL, SHEET_MAIN, SHEET_SLM, SHEET_MRI, SHEET_BLOCKS, BACKUP_FILE, DATA_SOURCE, DATA_PATH
+from .schema import clean_master, apply_master_schema, format_slm
+from .sheets import connect, pad_values, blocks_from_values, get_master_sync_state, master_sync_ranges, sync_master
+from .disk_cache import load_parquet_snapshot
+from .sources import LOCAL_SOURCES, load_excel_backup
+from .fixture import get_fixture_client
+from . import metrics
+
+# =========================================================================
+# LOADER TUNGGAL: SATU FETCH UNTUK SEMUA SHEET YANG DIPAKAI KEDUA DASHBOARD
+# =========================================================================
+# Hasil: (master, slm, mri_ops, sheet_blocks, status) + pesan error online (None jika sukses).
+# gsheets / fixture: ONLINE -> snapshot parquet online terakhir -> (gsheets saja) Excel backup.
+# Sumber lokal (LOCAL_SOURCES): langsung dari file, tanpa fallback.
+ONLINE_STATUS = {'gsheets': "ONLINE 🟢", 'fixture': "ONLINE 🧪 fixture"}
+
+def empty_data(status="ERROR 🔴"):
+    return pd.DataFrame(), format_slm(pd.DataFrame()), pd.DataFrame(), {}, status
+
+def get_client():
+    return get_fixture_client() if DATA_SOURCE == 'fixture' else connect()
+
+def load_online(gc, status="ONLINE 🟢"):
+    with metrics.timer('atm_sheets_call_seconds', source=DATA_SOURCE, call='open_by_url'): sh = gc.open_by_url(SHEET_URL)
+    state = get_master_sync_state()
+
+    with state['lock']:
+        # 1 metadata call: resolve semua worksheet sekaligus
+        with metrics.timer('atm_sheets_call_seconds', source=DATA_SOURCE, call='worksheets'): ws_map = {w.title: w for w in sh.worksheets()}
+        if SHEET_MAIN not in ws_map: raise gspread.exceptions.WorksheetNotFound(SHEET_MAIN)
+        other_sheets = [t for t in (SHEET_SLM, SHEET_MRI) if t in ws_map]
+        block_names = [b for b, (t, _, _) in SHEET_BLOCKS.items() if t in ws_map]
+
+        # 1 values call: master (full / header+tail) + SLM + MRI + blok range Monitoring/Sparepart
+        master_ranges = master_sync_ranges(state)
+        batch = [gspread.utils.absolute_range_name(SHEET_MAIN, r) for r in (master_ranges or [None])]
+        batch += [gspread.utils.absolute_range_name(t) for t in other_sheets]
+        batch += [gspread.utils.absolute_range_name(SHEET_BLOCKS[b][0], SHEET_BLOCKS[b][1]) for b in block_names]
+        with metrics.timer('atm_sheets_call_seconds', source=DATA_SOURCE, call='values_batch_get'): resp = sh.values_batch_get(batch)
+        value_ranges = [vr.get('values', []) for vr in resp['valueRanges']]
+
+        n_master = len(batch) - len(other_sheets) - len(block_names)
+        n_sheets = n_master + len(other_sheets)
+        sheet_vals = {t: pad_values(v) for t, v in zip(other_sheets, value_ranges[n_master:n_sheets])}
+        sheet_blocks = blocks_from_values(dict(zip(block_names, value_ranges[n_sheets:])))
+
+        # 1. LOAD MASTER (INCREMENTAL)
+        df = sync_master(ws_map[SHEET_MAIN], clean_master, prefetched=value_ranges[:n_master], schema_fn=apply_master_schema, ranges=master_ranges)
+
+    # 2. LOAD SLM
+    df_slm = pd.DataFrame()
+    try:
+        vals_slm = sheet_vals.get(SHEET_SLM, [])
+        if len(vals_slm) > 1:
+            df_slm = pd.DataFrame(vals_slm[1:], columns=vals_slm[0])
+    except: pass
+
+    # 3. LOAD MRI
+    df_mri_ops = pd.DataFrame()
+    try:
+        vals_mri = sheet_vals.get(SHEET_MRI, [])
+        if len(vals_mri) > 0: df_mri_ops = pd.DataFrame(vals_mri[1:], columns=vals_mri[0])
+    except: pass
+
+    # 4 & 5. MONITORING + SPAREPART: sudah berupa blok ber-header (sheet_blocks)
+    return df, format_slm(df_slm), df_mri_ops, sheet_blocks, status
+
+def load_data():
+    if DATA_SOURCE in LOCAL_SOURCES:
+        try: return LOCAL_SOURCES[DATA_SOURCE](DATA_PATH), None
+        except Exception as e: return empty_data(), f"Data Loading Error ({DATA_SOURCE}): {e}"
+    if DATA_SOURCE not in ONLINE_STATUS:
+        return empty_data(), f"ATM_DATA_SOURCE tidak dikenal: {DATA_SOURCE}"
+
+    try:
+        # --- PERCOBAAN A: ONLINE (GOOGLE SHEETS / FIXTURE) ---
+        gc = get_client()
+        if gc is None: raise Exception("No Connection")
+        return load_online(gc, ONLINE_STATUS[DATA_SOURCE]), None
+
+    except Exception as e:
+        error = f"Data Loading Error: {e}"
+
+        # --- PERCOBAAN B: OFFLINE (SNAPSHOT PARQUET ONLINE TERAKHIR) ---
+        cached = load_parquet_snapshot()
+        if cached is not None:
+            metrics.inc('atm_load_fallback_total', source=DATA_SOURCE, path='parquet')
+            return cached[0][:-1] + ("OFFLINE 🟠",), error
+
+        # --- PERCOBAAN C: OFFLINE (LOCAL EXCEL BACKUP) ---
+        if DATA_SOURCE == 'gsheets' and os.path.exists(BACKUP_FILE):
+            try:
+                data = load_excel_backup()
+                metrics.inc('atm_load_fallback_total', source=DATA_SOURCE, path='excel')
+                return data, error
+            except: pass
+
+        metrics.inc('atm_load_fallback_total', source=DATA_SOURCE, path='none')
+        return empty_data(), error
@@ -0,0 +1,150 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import streamlit as st
+from streamlit.logger import get_logger
+
+from .config import METRICS_PORT, METRICS_HOST, SHEET_MAIN, SHEET_SLM, SHEET_MRI
+from .schema import frame_mem_bytes
+
+# =========================================================================
+# METRICS PROMETHEUS (FORMAT TEKS, TANPA DEPENDENSI TAMBAHAN)
+# =========================================================================
+# Opt-in lewat ATM_METRICS_PORT. Registry satu per proses (dipakai kedua dashboard + refresher),
+# di-scrape dari thread HTTP samping: GET /metrics -> text exposition format 0.0.4.
+# Tanpa port semua fungsi pencatat langsung return (tanpa overhead).
+ENABLED = METRICS_PORT > 0
+LOAD_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+CALL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+RERUN_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# nama -> (tipe, help, bucket histogram)
+METRICS = {
+    'atm_load_seconds': ('histogram', 'Durasi load_data (semua sheet) per sumber data.', LOAD_BUCKETS),
+    'atm_sheets_call_seconds': ('histogram', 'Durasi panggilan API Sheets di jalur ONLINE (open, worksheets, values_batch_get).', CALL_BUCKETS),
+    'atm_load_total': ('counter', 'Hasil load_data per status (ONLINE / OFFLINE / LOCAL / ERROR).', None),
+    'atm_load_fallback_total': ('counter', 'Load ONLINE gagal -> jalur cadangan yang dipakai (parquet / excel / none).', None),
+    'atm_sheet_rows': ('gauge', 'Jumlah baris per sheet pada load terakhir.', None),
+    'atm_sheet_bytes': ('gauge', 'Memori frame per sheet pada load terakhir (byte, deep).', None),
+    'atm_snapshot_version': ('gauge', 'Versi snapshot data yang sedang dilayani.', None),
+    'atm_snapshot_loaded_timestamp_seconds': ('gauge', 'Waktu (unix) snapshot yang dilayani dimuat.', None),
+    'atm_cache_total': ('counter', 'Cache hit / miss / shared per cache (snapshot, ticker, badges, view model).', None),
+    'atm_singleflight_total': ('counter', 'Miss bersamaan per kunci: leader (menghitung) / follower (menunggu hasil leader).', None),
+    'atm_shared_total': ('counter', 'Cache bersama antar replika: elected (jadi penulis) / publish (penulis menulis versi) / adopt (pembaca memory-map versi baru).', None),
+    'atm_rerun_seconds': ('histogram', 'Durasi render satu rerun halaman per dashboard.', RERUN_BUCKETS),
+}
+
+@st.cache_resource(show_spinner=False)
+def get_registry():
+    # {(nama, label_tuple): nilai} ; histogram: [count per bucket..., sum, count]
+    return {'lock': threading.Lock(), 'values': {}}
+
+def label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def inc(name, value=1, **labels):
+    if not ENABLED: return
+    reg = get_registry(); key = (name, label_key(labels))
+    with reg['lock']: reg['values'][key] = reg['values'].get(key, 0) + value
+
+def set_gauge(name, value, **labels):
+    if not ENABLED: return
+    reg = get_registry()
+    with reg['lock']: reg['values'][(name, label_key(labels))] = value
+
+def observe(name, value, **labels):
+    if not ENABLED: return
+    buckets = METRICS[name][2]
+    reg = get_registry(); key = (name, label_key(labels))
+    with reg['lock']:
+        hist = reg['values'].get(key)
+        if hist is None: hist = reg['values'][key] = [0] * (len(buckets) + 2)
+        i = bisect.bisect_left(buckets, value)
+        if i < len(buckets): hist[i] += 1
+        hist[-2] += value; hist[-1] += 1
+
+# --- TEXT EXPOSITION FORMAT ---
+def escape(v):
+    return v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def fmt_labels(pairs):
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in pairs) + '}' if pairs else ''
+
+def fmt_value(v):
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+def render():
+    reg = get_registry()
+    with reg['lock']: values = {k: (list(v) if isinstance(v, list) else v) for k, v in reg['values'].items()}
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        series = sorted((labels, v) for (n, labels), v in values.items() if n == name)
+        if not series: continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for labels, v in series:
+            if kind != 'histogram':
+                lines.append(f"{name}{fmt_labels(labels)} {fmt_value(v)}")
+                continue
+            acc = 0
+            for le, n in zip(list(buckets) + ['+Inf'], v[:-2] + [v[-1] - sum(v[:-2])]):
+                acc += n
+                lines.append(f"{name}_bucket{fmt_labels(labels + (('le', str(le)),))} {acc}")
+            lines.append(f"{name}_sum{fmt_labels(labels)} {fmt_value(float(v[-2]))}")
+            lines.append(f"{name}_count{fmt_labels(labels)} {v[-1]}")
+    return '\n'.join(lines) + '\n'
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args): pass  # scrape tiap 15 dtk tidak perlu masuk log Streamlit
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    # Sekali per proses; port bentrok (proses lain) -> None, dashboard tetap jalan
+    if port <= 0: return None
+    try: server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        get_logger(__name__).warning("endpoint metrics tidak aktif (%s:%s): %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name='atm-metrics').start()
+    return server
+
+# --- PENCATAT TINGKAT TINGGI ---
+def status_word(status):
+    # "ONLINE 🟢" -> ONLINE, "LOCAL 🔵 excel" -> LOCAL
+    return str(status).split()[0] if status else 'UNKNOWN'
+
+def record_load(data, seconds, source):
+    # Satu hasil load_data (refresher / cold start); gauge sheet hanya jika ada data
+    if not ENABLED: return
+    status = status_word(data[-1])
+    observe('atm_load_seconds', seconds, source=source)
+    inc('atm_load_total', source=source, status=status)
+    if status == 'ERROR': return
+    for sheet, frame in ((SHEET_MAIN, data[0]), (SHEET_SLM, data[1]), (SHEET_MRI, data[2])):
+        set_gauge('atm_sheet_rows', len(frame), sheet=sheet)
+        set_gauge('atm_sheet_bytes', frame_mem_bytes(frame), sheet=sheet)
+
+def record_snapshot(snapshot):
+    if not ENABLED or snapshot is None: return
+    set_gauge('atm_snapshot_version', snapshot['version'])
+    set_gauge('atm_snapshot_loaded_timestamp_seconds', snapshot['loaded_at'])
+
+@contextmanager
+def timer(name, **labels):
+    # with metrics.timer('atm_sheets_call_seconds', call='open'): ...
+    t0 = time.perf_counter()
+    try: yield
+    finally: observe(name, time.perf_counter() - t0, **labels)
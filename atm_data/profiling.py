@@ -0,0 +1,168 @@
+import io
+import time
+import marshal
+import pstats
+import cProfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+import streamlit as st
+
+from . import metrics
+
+# =========================================================================
+# PROFILER PER RERUN (PANEL DEBUG TERSEMBUNYI: TAMBAHKAN ?debug=1 DI URL)
+# =========================================================================
+# begin_rerun(app) di awal script, stage(nama) membungkus bagian halaman (snapshot, ticker,
+# view model / pivot, render Styler, Plotly), render_debug_panel() di akhir script.
+# Per stage dicatat durasi (total & self = tanpa stage anak), jumlah baris & cache hit/miss;
+# PERF_HISTORY rerun terakhir disimpan di session_state. Fungsi ter-cache memanggil cache_miss()
+# di badannya (badan hanya jalan saat miss) -> stage cached=True terdekat tercatat 'miss'.
+# Tanpa ?debug=1 (dan tanpa ATM_METRICS_PORT) semua fungsi di sini no-op. Satu rerun bisa
+# di-capture cProfile (file .prof). Dengan metrics aktif, durasi rerun & cache hit/miss per stage
+# ikut diekspor (atm_rerun_seconds, atm_cache_total) walau panel tidak ditampilkan.
+PERF_HISTORY = 20
+PROFILE_TOP = 30
+
+_local = threading.local()  # rerun aktif milik thread script session ini
+
+def debug_enabled():
+    try: return st.query_params.get('debug') == '1'
+    except: return False
+
+def current_run():
+    run = getattr(_local, 'run', None)
+    return run if run is not None and run['ms'] is None else None
+
+def begin_rerun(app):
+    # Rerun sebelumnya yang terpotong st.rerun() / st.stop() ditutup dulu
+    try: finish_rerun(st.session_state.get('perf_run'), interrupted=True)
+    except: pass
+    _local.run = None
+    debug = debug_enabled()
+    if not debug and not metrics.ENABLED: return None
+    t0 = time.perf_counter()
+    run = {'app': app, 'at': datetime.now(), 't0': t0, 't_last': t0, 'ms': None, 'stages': [], 'stack': [], 'profiler': None, 'interrupted': False, 'debug': debug}
+    if debug and st.session_state.pop('perf_profile_next', False):
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+            run['profiler'] = prof
+        except ValueError: pass  # profiler lain sedang aktif
+    _local.run = run
+    st.session_state['perf_run'] = run
+    return run
+
+@contextmanager
+def stage(name, rows=None, cached=False):
+    # with stage('tiers') as perf: ... ; perf['rows'] = len(frame)  (dict kosong jika debug mati)
+    run = current_run()
+    if run is None:
+        yield {}
+        return
+    parent = run['stack'][-1] if run['stack'] else None
+    rec = {'stage': name, 'depth': len(run['stack']), 'ms': 0.0, 'self_ms': 0.0, 'child_ms': 0.0, 'rows': rows, 'cache': 'hit' if cached else ''}
+    run['stages'].append(rec)
+    run['stack'].append(rec)
+    t0 = time.perf_counter()
+    try: yield rec
+    finally:
+        rec['ms'] = (time.perf_counter() - t0) * 1000
+        rec['self_ms'] = rec['ms'] - rec['child_ms']
+        run['t_last'] = time.perf_counter()
+        if run['stack'] and run['stack'][-1] is rec: run['stack'].pop()
+        if parent is not None: parent['child_ms'] += rec['ms']
+
+def cache_result(result):
+    # result: 'miss' (badan fungsi jalan) / 'shared' (menunggu hasil session lain, lihat singleflight)
+    run = current_run()
+    if run is None: return
+    for rec in reversed(run['stack']):
+        if rec['cache']:
+            rec['cache'] = result
+            return
+
+def cache_miss():
+    cache_result('miss')
+
+def set_rows(value):
+    # Jumlah baris hasil stage aktif (DataFrame / Series / tuple berisi frame)
+    run = current_run()
+    if run is None or not run['stack']: return
+    if isinstance(value, (tuple, list)) and value: value = value[-1]
+    if isinstance(value, dict): value = next((v for v in value.values() if isinstance(v, pd.DataFrame)), None)
+    if isinstance(value, (pd.DataFrame, pd.Series)): run['stack'][-1]['rows'] = len(value)
+
+def finish_rerun(run, interrupted=False):
+    if run is None or run['ms'] is not None: return
+    # Rerun terpotong ditutup di rerun berikutnya -> akhiri di stage terakhir, bukan sekarang
+    run['ms'] = ((run['t_last'] if interrupted else time.perf_counter()) - run['t0']) * 1000
+    run['interrupted'] = interrupted
+    run['stack'] = []
+    prof = run.pop('profiler', None)
+    if prof is not None:
+        prof.disable()
+        prof.create_stats()
+        # Format file .prof = marshal(stats), sama dengan Profile.dump_stats -> bisa dibuka snakeviz / pstats.
+        # Di-dump sebelum pstats.Stats(prof) (yang mengosongkan prof.stats)
+        data = marshal.dumps(prof.stats)
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        st.session_state['perf_prof'] = {'app': run['app'], 'at': run['at'], 'ms': run['ms'], 'data': data, 'text': out.getvalue()}
+    if metrics.ENABLED:
+        if not interrupted: metrics.observe('atm_rerun_seconds', run['ms'] / 1000, app=run['app'])
+        for rec in run['stages']:
+            if rec['cache']: metrics.inc('atm_cache_total', app=run['app'], cache=rec['stage'], result=rec['cache'])
+    if not run['debug']: return
+    history = st.session_state.get('perf_history')
+    if history is None: history = st.session_state['perf_history'] = deque(maxlen=PERF_HISTORY)
+    history.append(run)
+
+# --- TABEL PANEL ---
+def stage_table(run):
+    return pd.DataFrame([{
+        'STAGE': '· ' * rec['depth'] + rec['stage'], 'MS': round(rec['ms'], 1), 'SELF MS': round(rec['self_ms'], 1),
+        'ROWS': rec['rows'] if rec['rows'] is not None else pd.NA, 'CACHE': rec['cache'],
+    } for rec in run['stages']], columns=['STAGE', 'MS', 'SELF MS', 'ROWS', 'CACHE'])
+
+def history_table(history):
+    rows = []
+    for run in reversed(history):
+        slow = max(run['stages'], key=lambda r: r['self_ms'], default=None)
+        rows.append({
+            'WAKTU': run['at'].strftime('%H:%M:%S'), 'TOTAL MS': round(run['ms'], 1), 'STAGES': len(run['stages']),
+            'TERLAMBAT': f"{slow['stage']} ({slow['self_ms']:.0f} ms)" if slow else '-',
+            'MISS': sum(r['cache'] == 'miss' for r in run['stages']), 'HIT': sum(r['cache'] == 'hit' for r in run['stages']),
+            'TERPOTONG': run['interrupted'],
+        })
+    return pd.DataFrame(rows)
+
+def request_profile():
+    st.session_state['perf_profile_next'] = True
+
+def render_debug_panel(store=None):
+    run = current_run()
+    if run is None: return
+    finish_rerun(run)
+    _local.run = None
+    if not run['debug']: return
+    with st.expander(f"🛠️ Debug Profiler ({run['app']}) - rerun {run['ms']:.0f} ms", expanded=True):
+        if store is not None and store.get('snapshot'):
+            snap = store['snapshot']
+            load_ms = store.get('load_ms')
+            st.caption(f"Data v{snap['version']} • {snap['data'][-1]} • umur {time.time() - snap['loaded_at']:.0f} dtk"
+                       + (f" • load_data terakhir {load_ms:.0f} ms (background)" if load_ms is not None else "")
+                       + (f" • replika {store['role']} (versi bersama v{store.get('shared_version')})" if store.get('role') else ""))
+        st.dataframe(stage_table(run), use_container_width=True, hide_index=True)
+        st.markdown(f"**{PERF_HISTORY} rerun terakhir**")
+        st.dataframe(history_table(st.session_state.get('perf_history', [])), use_container_width=True, hide_index=True)
+
+        c1, c2 = st.columns(2)
+        c1.button("⏺️ Profile rerun berikutnya (cProfile)", on_click=request_profile, key='perf_profile_btn')
+        prof = st.session_state.get('perf_prof')
+        if prof:
+            c2.download_button(f"⬇️ Download .prof ({prof['at']:%H:%M:%S}, {prof['ms']:.0f} ms)", prof['data'],
+                               file_name=f"{prof['app']}_{prof['at']:%Y%m%d_%H%M%S}.prof", mime='application/octet-stream', key='perf_prof_dl')
+            st.code(prof['text'], language=None)
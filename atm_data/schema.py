@@ -0,0 +1,111 @@
+import pandas as pd
+
+# =========================================================================
+# SCHEMA BERSIH MASTER & SLM (SATU ATURAN UNTUK KEDUA DASHBOARD)
+# =========================================================================
+# --- FORMAT MASTER (AIMS_Master) ---
+# BULAN     : teks sheet (strip + capitalize)
+# BULAN_EN  : nama bulan Inggris dari TANGGAL (fallback BULAN) -> kunci filter bulan
+# TID       : string tanpa spasi tepi
+def clean_master(df_in):
+    if df_in.empty: return df_in
+    df_in.columns = df_in.columns.str.strip().str.upper()
+    df_in = df_in.loc[:, (df_in.columns != '') & ~df_in.columns.duplicated()].copy()
+
+    if 'TANGGAL' in df_in.columns:
+        df_in['TANGGAL'] = pd.to_datetime(df_in['TANGGAL'], errors='coerce')
+        calc_month = df_in['TANGGAL'].dt.strftime('%B')
+    else:
+        calc_month = pd.Series(None, index=df_in.index, dtype=object)
+
+    if 'BULAN' in df_in.columns:
+        df_in['BULAN'] = df_in['BULAN'].astype(str).str.strip().str.capitalize()
+        df_in['BULAN_EN'] = calc_month.fillna(df_in['BULAN'])
+    else:
+        df_in['BULAN_EN'] = calc_month
+
+    if 'WAKTU INSERT' in df_in.columns: df_in['WAKTU_INSERT'] = pd.to_datetime(df_in['WAKTU INSERT'], errors='coerce')
+
+    # --- PERBAIKAN KOLOM COMPLAIN (PASTIKAN ANGKA) ---
+    if 'JUMLAH_COMPLAIN' in df_in.columns:
+        # Paksa jadi numeric, yang error jadi NaN lalu diisi 0
+        df_in['JUMLAH_COMPLAIN'] = pd.to_numeric(df_in['JUMLAH_COMPLAIN'].astype(str).str.replace('-', '0'), errors='coerce').fillna(0).astype(int)
+
+    if 'WEEK' not in df_in.columns and 'BULAN_WEEK' in df_in.columns: df_in['WEEK'] = df_in['BULAN_WEEK']
+    if 'TID' in df_in.columns: df_in['TID'] = df_in['TID'].astype(str).str.strip()
+
+    return df_in
+
+# --- SCHEMA RINGKAS MASTER (KATEGORI + INT KECIL) ---
+# Kolom teks berulang -> category (filter == / isin jadi bandingkan kode int, bukan string),
+# JUMLAH_COMPLAIN -> int8/16/32, WEEK_NUM int8 (1-4 untuk W1-W4, 0 = di luar itu).
+# Append incremental: schema dipasang ke baris baru saja, lalu digabung lewat concat_master.
+MASTER_CATEGORY_COLS = ['TID', 'CABANG', 'LOKASI', 'KATEGORI', 'WEEK', 'BULAN', 'BULAN_EN', 'STATUS MRI', 'TYPE MRI']
+WEEK_NUM_MAP = {'W1': 1, 'W2': 2, 'W3': 3, 'W4': 4}
+
+def frame_mem_bytes(df_in):
+    return int(df_in.memory_usage(index=True, deep=True).sum())
+
+def apply_master_schema(df_in):
+    if df_in.empty: return df_in
+    mem_before = frame_mem_bytes(df_in)
+    for c in MASTER_CATEGORY_COLS:
+        if c in df_in.columns and not isinstance(df_in[c].dtype, pd.CategoricalDtype):
+            df_in[c] = df_in[c].astype('category')
+    if 'JUMLAH_COMPLAIN' in df_in.columns:
+        df_in['JUMLAH_COMPLAIN'] = pd.to_numeric(df_in['JUMLAH_COMPLAIN'], downcast='integer')
+    if 'WEEK' in df_in.columns:
+        # map di level kategori (beberapa nilai unik), bukan per baris
+        week_num = pd.Series([WEEK_NUM_MAP.get(w, 0) for w in df_in['WEEK'].cat.categories], dtype='int8')
+        codes = pd.Series(df_in['WEEK'].cat.codes.to_numpy())
+        df_in['WEEK_NUM'] = week_num.reindex(codes).fillna(0).astype('int8').to_numpy()
+    df_in.attrs['mem_bytes'] = [mem_before, frame_mem_bytes(df_in)]
+    return df_in
+
+def concat_master(df_old, df_new):
+    # Kategori digabung dulu (kategori lama tetap urut, yang baru ditambah di belakang) -> hasil concat
+    # tetap category & biaya sebanding jumlah baris baru, bukan menghitung ulang schema seluruh master.
+    # Salinan dangkal: frame lama masih dilayani snapshot aktif, tidak boleh diubah di tempat.
+    if df_old is None or df_old.empty: return df_new
+    if df_new.empty: return df_old
+    df_old, df_new = df_old.copy(deep=False), df_new.copy(deep=False)
+    for c in df_old.columns.intersection(df_new.columns):
+        if not (isinstance(df_old[c].dtype, pd.CategoricalDtype) and isinstance(df_new[c].dtype, pd.CategoricalDtype)): continue
+        extra = df_new[c].cat.categories.difference(df_old[c].cat.categories, sort=False)
+        if len(extra): df_old[c] = df_old[c].cat.add_categories(extra)
+        df_new[c] = df_new[c].cat.set_categories(df_old[c].cat.categories)
+    out = pd.concat([df_old, df_new], ignore_index=True)
+    if 'mem_bytes' in df_old.attrs and 'mem_bytes' in df_new.attrs:
+        out.attrs['mem_bytes'] = [a + b for a, b in zip(df_old.attrs['mem_bytes'], df_new.attrs['mem_bytes'])]
+    return out
+
+def plain_keys(df_in):
+    # Frame agregat kecil: kolom kategori -> object & int kecil -> int64 sebelum merge/fillna(0)/render
+    # (pivot_table menurunkan hasil sum ke dtype asal, mis. int8)
+    cat_cols = [c for c in df_in.columns if isinstance(df_in[c].dtype, pd.CategoricalDtype)]
+    if cat_cols: df_in[cat_cols] = df_in[cat_cols].astype(object)
+    small_int = [c for c in df_in.columns if df_in[c].dtype.kind == 'i' and df_in[c].dtype.itemsize < 8]
+    if small_int: df_in[small_int] = df_in[small_int].astype('int64')
+    if isinstance(df_in.columns, pd.CategoricalIndex): df_in.columns = df_in.columns.astype(object)
+    return df_in
+
+# --- FORMAT SLM VISIT LOG (DIPAKAI ONLINE & OFFLINE) ---
+# TGL_VISIT: datetime (NaT jika tanpa kolom tanggal), BULAN_EN: bulan kunjungan, TID: string, ACTION: kolom tindakan ("-" jika tidak ada)
+def format_slm(df_slm):
+    df_slm.columns = df_slm.columns.astype(str).str.strip()
+    col_tgl = next((c for c in df_slm.columns if 'VISIT' in c.upper() or 'TANGGAL' in c.upper()), None)
+    col_tgl = col_tgl or next((c for c in df_slm.columns if 'TGL' in c.upper() or 'DATE' in c.upper()), None)
+    if col_tgl:
+        df_slm['TGL_VISIT'] = pd.to_datetime(df_slm[col_tgl], errors='coerce')
+        df_slm['BULAN_EN'] = df_slm['TGL_VISIT'].dt.strftime('%B')
+    else:
+        df_slm['TGL_VISIT'] = pd.Series(pd.NaT, index=df_slm.index, dtype='datetime64[ns]')  # halaman menampilkan "-"
+    col_tid_slm = next((c for c in df_slm.columns if 'TID' in c.upper()), None)
+    if col_tid_slm:
+        df_slm['TID'] = df_slm[col_tid_slm].astype(str).str.strip()
+        df_slm.rename(columns={col_tid_slm: 'TID'}, inplace=True)
+    col_act = next((c for c in df_slm.columns if any(k in c.upper() for k in ('ACTION', 'TINDAKAN', 'KET'))), None)
+    df_slm['ACTION'] = df_slm[col_act] if col_act else "-"
+    for c in ('BULAN_EN', 'TID'):
+        if c not in df_slm.columns: df_slm[c] = ''
+    return df_slm
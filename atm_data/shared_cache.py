@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import shutil
+import socket
+import threading
+from contextlib import contextmanager
+import streamlit as st
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows: tanpa flock cache bersama tidak aktif (tiap proses memuat sendiri)
+
+from .config import SHARED_DIR, SHARED_ROLE, SHARED_KEEP_VERSIONS, SNAPSHOT_MANIFEST
+from .disk_cache import write_snapshot_dir, load_parquet_snapshot, write_json_atomic
+from . import metrics
+
+# =========================================================================
+# CACHE BERSAMA ANTAR REPLIKA (ARROW IPC DI FOLDER BERSAMA + MEMORY-MAP)
+# =========================================================================
+# Beberapa replika dashboard di belakang load balancer: hanya replika penulis yang memuat dari
+# Google. Setiap load ONLINE ditulis sebagai folder versi vNNNNNNNN/ (satu file .arrow per frame,
+# tanpa kompresi, + manifest per frame), lalu manifest.json di akar SHARED_DIR ditukar atomik.
+# Replika pembaca memory-map versi terbaru -> buffer kolom dibagi lewat page cache OS (bukan
+# salinan per proses) dan trafik Sheets tetap satu refresher berapa pun jumlah replikanya.
+#   writer.lock   : flock eksklusif milik penulis selama prosesnya hidup. Proses mati -> lock lepas
+#                   otomatis -> pembaca pertama yang mengecek mengambil alih (ATM_SHARED_ROLE=auto).
+#   manifest.lock : LOCK_EX saat manifest ditukar & versi lama dihapus, LOCK_SH saat pembaca
+#                   membuka file versi (versi yang sedang dibuka tidak terhapus di tengah jalan).
+ENABLED = bool(SHARED_DIR) and fcntl is not None
+WRITER_LOCK = 'writer.lock'
+MANIFEST_LOCK = 'manifest.lock'
+
+def replica_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+@st.cache_resource(show_spinner=False)
+def get_writer_state():
+    # fd writer.lock yang dipegang proses ini (None = bukan penulis)
+    return {'lock': threading.Lock(), 'fd': None}
+
+def claim_writer():
+    # Non-blocking: True jika proses ini memegang (atau baru saja mendapat) lock penulis
+    if not ENABLED or SHARED_ROLE == 'reader': return False
+    state = get_writer_state()
+    with state['lock']:
+        if state['fd'] is not None: return True
+        os.makedirs(SHARED_DIR, exist_ok=True)
+        fd = os.open(os.path.join(SHARED_DIR, WRITER_LOCK), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        # Isi file hanya informasi (siapa penulisnya); yang menentukan adalah flock
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{replica_id()}\n".encode('utf-8'))
+        state['fd'] = fd
+    metrics.inc('atm_shared_total', action='elected')
+    return True
+
+@contextmanager
+def manifest_lock(mode):
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    fd = os.open(os.path.join(SHARED_DIR, MANIFEST_LOCK), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, mode)
+        yield
+    finally:
+        os.close(fd)  # menutup fd melepas flock
+
+def read_current():
+    # manifest.json akar: {'version', 'dir', 'loaded_at', 'status', 'published_at', 'writer'} atau None
+    try:
+        with open(os.path.join(SHARED_DIR, SNAPSHOT_MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def prune(version):
+    # Simpan SHARED_KEEP_VERSIONS versi terakhir. Pembaca yang masih memakai versi terhapus tetap aman:
+    # halaman yang sudah di-map tetap valid sampai frame-nya dilepas. Sisa folder .tmp dari penulis
+    # yang mati di tengah publish ikut dibersihkan (publish hanya jalan di satu proses pemegang lock).
+    for name in os.listdir(SHARED_DIR):
+        old_version = name.startswith('v') and name[1:].isdigit() and int(name[1:]) <= version - SHARED_KEEP_VERSIONS
+        if old_version or (name.startswith('.v') and '.tmp-' in name):
+            shutil.rmtree(os.path.join(SHARED_DIR, name), ignore_errors=True)
+
+def publish(data, loaded_at):
+    # Penulis, setelah load ONLINE: tulis folder versi baru di luar lock (bisa beberapa detik),
+    # lock eksklusif hanya untuk menukar manifest & menghapus versi lama -> manifest akar
+    current = read_current()
+    version = (current['version'] if current else 0) + 1
+    name = f"v{version:08d}"
+    tmp_dir = os.path.join(SHARED_DIR, f".{name}.tmp-{os.getpid()}")
+    write_snapshot_dir(data, loaded_at, tmp_dir, fmt='arrow')
+    shutil.rmtree(os.path.join(SHARED_DIR, name), ignore_errors=True)
+    os.replace(tmp_dir, os.path.join(SHARED_DIR, name))
+
+    current = {'version': version, 'dir': name, 'loaded_at': loaded_at, 'status': data[-1], 'published_at': time.time(), 'writer': replica_id()}
+    with manifest_lock(fcntl.LOCK_EX):
+        write_json_atomic(os.path.join(SHARED_DIR, SNAPSHOT_MANIFEST), current)
+        prune(version)
+    metrics.inc('atm_shared_total', action='publish')
+    return current
+
+def load_current(skip_version=None):
+    # Pembaca: -> (data, manifest versi, manifest akar) atau None (belum ada / versi sama dengan skip_version)
+    if not ENABLED: return None
+    current = read_current()
+    if current is None or current['version'] == skip_version: return None
+    with manifest_lock(fcntl.LOCK_SH):
+        current = read_current()  # baca ulang di dalam lock: penulis bisa sudah menukar versi
+        cached = load_parquet_snapshot(os.path.join(SHARED_DIR, current['dir']))
+    if cached is None: return None
+    metrics.inc('atm_shared_total', action='adopt')
+    return cached + (current,)
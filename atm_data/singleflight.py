@@ -0,0 +1,49 @@
+import threading
+import streamlit as st
+
+from . import metrics
+from .profiling import cache_result
+
+# =========================================================================
+# SINGLE-FLIGHT: SATU PEMBANGUN PER KUNCI, SESSION LAIN MENUNGGU HASIL YANG SAMA
+# =========================================================================
+# Saat banyak session rerun bersamaan (pergantian shift, data versi baru) dan semuanya miss
+# pada kunci yang sama, hanya session pertama (leader) yang menjalankan fn; sisanya (follower)
+# menunggu lalu memakai hasil / error leader. Kunci dilepas setelah selesai -> hasil disimpan
+# oleh cache pemanggil, bukan di sini. st.cache_resource sudah punya kunci per value (lihat
+# compute_value_lock Streamlit); helper ini untuk cache buatan sendiri (view model, dsb).
+FLIGHT_WAIT_SEC = 120
+
+@st.cache_resource(show_spinner=False)
+def get_flights():
+    return {'lock': threading.Lock(), 'calls': {}}
+
+def single_flight(key, fn, name='', timeout=FLIGHT_WAIT_SEC):
+    flights = get_flights()
+    with flights['lock']:
+        call = flights['calls'].get(key)
+        leader = call is None
+        if leader: call = flights['calls'][key] = {'done': threading.Event(), 'value': None, 'error': None, 'abandoned': False}
+
+    if not leader:
+        metrics.inc('atm_singleflight_total', flight=name, role='follower')
+        # Leader terhenti oleh kontrol script (st.rerun / st.stop) atau terlalu lama -> hitung sendiri
+        if call['done'].wait(timeout) and not call['abandoned']:
+            cache_result('shared')
+            if call['error'] is not None: raise call['error']
+            return call['value']
+        return fn()
+
+    metrics.inc('atm_singleflight_total', flight=name, role='leader')
+    try:
+        call['value'] = fn()
+        return call['value']
+    except Exception as e:
+        call['error'] = e
+        raise
+    except BaseException:
+        call['abandoned'] = True
+        raise
+    finally:
+        with flights['lock']: flights['calls'].pop(key, None)
+        call['done'].set()
@@ -0,0 +1,126 @@
+import os
+import sqlite3
+import pandas as pd
+
+from .config import SHEET_MAIN, SHEET_SLM, SHEET_MRI, SHEET_MONITORING, SHEET_SP, BACKUP_FILE, PROD_SNAPSHOT_DIR
+from .schema import clean_master, apply_master_schema, format_slm
+from .sheets import pad_values, blocks_from_frame
+from .disk_cache import load_parquet_snapshot
+
+# =========================================================================
+# SUMBER DATA LOKAL (EXCEL, PARQUET, CSV, SQLITE) -> DATA TUPLE YANG SAMA DENGAN ONLINE
+# =========================================================================
+# Setiap backend: fungsi (path) -> (master, slm, mri_ops, sheet_blocks, status).
+# CSV & SQLite menyimpan sheet sebagai grid mentah (baris pertama = baris 1 sheet),
+# jadi satu layout bisa memuat sheet tabel (AIMS_Master) maupun sheet blok (Sparepart).
+#   csv    : folder berisi <judul sheet>.csv
+#   sqlite : satu tabel per sheet (nama tabel = judul sheet, kolom c0..cN)
+def local_status(name):
+    return f"LOCAL 🔵 {name}"
+
+# --- WORKBOOK = {judul_sheet: grid string} ---
+def book_from_excel(path):
+    sheets = pd.read_excel(path, sheet_name=None, header=None, dtype=str)
+    return {title: frame.fillna('').values.tolist() for title, frame in sheets.items()}
+
+def book_from_csv(folder):
+    book = {}
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith('.csv'): continue
+        frame = pd.read_csv(os.path.join(folder, name), header=None, dtype=str, keep_default_na=False)
+        book[os.path.splitext(name)[0]] = frame.values.tolist()
+    return book
+
+def book_from_sqlite(path):
+    with sqlite3.connect(path) as conn:
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        return {t: [['' if x is None else str(x) for x in row] for row in conn.execute(f'SELECT * FROM "{t}" ORDER BY rowid')] for t in tables}
+
+def book_kind(path):
+    if os.path.isdir(path) or not os.path.splitext(path)[1]: return 'csv'
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xlsm', '.xls'): return 'excel'
+    if ext in ('.db', '.sqlite', '.sqlite3'): return 'sqlite'
+    raise ValueError(f"Format workbook tidak dikenal: {path}")
+
+def book_from_path(path):
+    return {'excel': book_from_excel, 'csv': book_from_csv, 'sqlite': book_from_sqlite}[book_kind(path)](path)
+
+def export_book(book, path):
+    # Tulis workbook (mis. hasil generate_book) ke xlsx / folder csv / sqlite untuk dipakai ulang
+    kind = book_kind(path)
+    if kind == 'csv':
+        os.makedirs(path, exist_ok=True)
+        for title, grid in book.items():
+            pd.DataFrame(pad_values(grid)).to_csv(os.path.join(path, f"{title}.csv"), header=False, index=False)
+    elif kind == 'excel':
+        with pd.ExcelWriter(path) as writer:
+            for title, grid in book.items():
+                pd.DataFrame(pad_values(grid)).to_excel(writer, sheet_name=title, header=False, index=False)
+    else:
+        with sqlite3.connect(path) as conn:
+            for title, grid in book.items():
+                frame = pd.DataFrame(pad_values(grid))
+                frame.columns = [f"c{i}" for i in range(frame.shape[1])]
+                frame.to_sql(title, conn, if_exists='replace', index=False)
+
+# --- WORKBOOK -> DATA TUPLE (ATURAN SAMA DENGAN JALUR ONLINE) ---
+def frame_from_grid(grid):
+    grid = pad_values(grid, cols=max((len(r) for r in grid), default=0))
+    if not grid: return pd.DataFrame()
+    return pd.DataFrame(grid[1:], columns=grid[0])
+
+def data_from_book(book, status):
+    master = apply_master_schema(clean_master(frame_from_grid(book.get(SHEET_MAIN, []))))
+    df_slm = format_slm(frame_from_grid(book.get(SHEET_SLM, [])))
+    df_mri_ops = frame_from_grid(book.get(SHEET_MRI, []))
+    sheet_blocks = {}
+    for sheet in (SHEET_MONITORING, SHEET_SP):
+        sheet_blocks.update(blocks_from_frame(pd.DataFrame(pad_values(book.get(sheet, []))), sheet))
+    return master, df_slm, df_mri_ops, sheet_blocks, status
+
+# --- BACKEND ---
+def load_excel_backup(backup_file=BACKUP_FILE, status="OFFLINE 🟠"):
+    # Load Master
+    df = pd.read_excel(backup_file, sheet_name=SHEET_MAIN, dtype=str)
+    df = apply_master_schema(clean_master(df))
+
+    # Load SLM
+    df_slm = format_slm(pd.read_excel(backup_file, sheet_name=SHEET_SLM, dtype=str))
+
+    try: df_mri_ops = pd.read_excel(backup_file, sheet_name=SHEET_MRI, dtype=str)
+    except: df_mri_ops = pd.DataFrame()
+
+    try: df_mon = pd.read_excel(backup_file, sheet_name=SHEET_MONITORING, header=None, dtype=str)
+    except: df_mon = pd.DataFrame()
+
+    try: df_sp_raw = pd.read_excel(backup_file, sheet_name=SHEET_SP, header=None, dtype=str)
+    except: df_sp_raw = pd.DataFrame()
+
+    sheet_blocks = {**blocks_from_frame(df_mon, SHEET_MONITORING), **blocks_from_frame(df_sp_raw, SHEET_SP)}
+    return df, df_slm, df_mri_ops, sheet_blocks, status
+
+def require_path(path, name):
+    if not path: raise ValueError(f"ATM_DATA_PATH wajib diisi untuk sumber '{name}'")
+    return path
+
+def load_excel_source(path):
+    return load_excel_backup(path or BACKUP_FILE, local_status('excel'))
+
+def load_parquet_source(path):
+    cached = load_parquet_snapshot(path or PROD_SNAPSHOT_DIR)
+    if cached is None: raise FileNotFoundError(f"Snapshot parquet tidak ditemukan: {path or PROD_SNAPSHOT_DIR}")
+    return cached[0][:-1] + (local_status('parquet'),)
+
+def load_csv_source(path):
+    return data_from_book(book_from_csv(require_path(path, 'csv')), local_status('csv'))
+
+def load_sqlite_source(path):
+    return data_from_book(book_from_sqlite(require_path(path, 'sqlite')), local_status('sqlite'))
+
+LOCAL_SOURCES = {
+    'excel': load_excel_source,
+    'parquet': load_parquet_source,
+    'csv': load_csv_source,
+    'sqlite': load_sqlite_source,
+}
@@ -0,0 +1,168 @@
+import time
+import threading
+import streamlit as st
+
+from .config import REFRESH_INTERVAL_SEC, REFRESH_RETRY_SEC, DATA_SOURCE, SHARED_POLL_SEC, SHARED_WAIT_SEC
+from .loader import load_data
+from .disk_cache import save_parquet_snapshot, load_parquet_snapshot, seed_master_sync
+from .profiling import stage, cache_miss
+from . import metrics, shared_cache
+
+# =========================================================================
+# SNAPSHOT DATA + REFRESHER BACKGROUND (STALE-WHILE-REVALIDATE)
+# =========================================================================
+# Satu store per proses untuk kedua dashboard: satu fetch, satu salinan data di memori
+# (keduanya dalam satu proses lewat dashboard.py; proses / replika terpisah -> ATM_SHARED_DIR).
+# Semua session dilayani dari snapshot yang sama (instan). Thread background
+# memuat ulang data tiap REFRESH_INTERVAL_SEC lalu menukar snapshot secara atomik,
+# jadi tidak ada user yang "kena giliran" menunggu fetch Google saat TTL habis.
+# Hanya cold start (snapshot belum ada sama sekali) yang memuat secara sinkron.
+#
+# Struktur turunan per aplikasi (cube, index TID/SLM, ...) didaftarkan lewat get_snapshot(app, derive_fn)
+# dan dibangun ulang oleh refresher setiap data berganti -> snapshot['derived'][app].
+#
+# Single-flight: satu load per versi data. Cold start -> session pertama memuat, session lain
+# menunggu load_lock lalu memakai snapshot yang sama; refresher hanya satu thread per proses
+# (thread_lock) dan melewati jadwal jika snapshot sudah diganti selama ia menunggu.
+#
+# Banyak replika (ATM_SHARED_DIR, lihat shared_cache.py): store['role'] = 'writer' | 'reader'.
+# Penulis berjalan seperti di atas + publish versi Arrow tiap load ONLINE; refresher pembaca
+# tidak memuat dari Google, hanya memory-map versi bersama terbaru tiap SHARED_POLL_SEC dan
+# mengambil alih peran penulis jika writer.lock kosong.
+@st.cache_resource(show_spinner=False)
+def get_data_store():
+    return {'load_lock': threading.Lock(), 'thread_lock': threading.Lock(), 'snapshot': None, 'refreshing': False, 'thread': None, 'error': None, 'derivers': {}, 'role': None}
+
+def build_snapshot(store, data, loaded_at, version):
+    # Dibangun sekali per versi data, di luar jalur interaktif
+    derived = {app: fn(data) for app, fn in list(store['derivers'].items())}
+    return {'data': data, 'derived': derived, 'loaded_at': loaded_at, 'version': version}
+
+def swap_snapshot(store):
+    # Dipanggil dengan load_lock terpegang. Snapshot lama tetap dipakai kalau
+    # reload gagal / turun kelas (ONLINE -> OFFLINE/ERROR).
+    store['refreshing'] = True
+    try:
+        t0 = time.perf_counter()
+        data, store['error'] = load_data()
+        store['load_ms'] = (time.perf_counter() - t0) * 1000
+        metrics.record_load(data, store['load_ms'] / 1000, DATA_SOURCE)
+        old = store['snapshot']
+        loaded_at = time.time()
+        if old is None or "ONLINE" in data[-1] or "ONLINE" not in old['data'][-1]:
+            store['snapshot'] = build_snapshot(store, data, loaded_at, (old['version'] + 1) if old else 1)
+            metrics.record_snapshot(store['snapshot'])
+        store['last_attempt_ok'] = "ONLINE" in data[-1]
+        if store['last_attempt_ok']:
+            try: save_parquet_snapshot(data, loaded_at)
+            except Exception: pass
+            if store['role'] == 'writer': publish_shared(store, data, loaded_at)
+    finally:
+        store['refreshing'] = False
+
+def warm_start(store):
+    # Cold start proses: pakai snapshot parquet dulu, refresher menyusul di background
+    cached = load_parquet_snapshot()
+    if cached is None: return False
+    data, manifest = cached
+    seed_master_sync(manifest, data[0])
+    store['snapshot'] = build_snapshot(store, data, manifest['loaded_at'], 1)
+    store['last_attempt_ok'] = True
+    metrics.record_snapshot(store['snapshot'])
+    return True
+
+# --- CACHE BERSAMA ANTAR REPLIKA ---
+def publish_shared(store, data, loaded_at):
+    try: store['shared_version'] = shared_cache.publish(data, loaded_at)['version']
+    except Exception: pass
+
+def adopt_shared(store):
+    # Dipanggil dengan load_lock terpegang: pakai versi bersama terbaru (memory-map) jika belum dipakai
+    cached = shared_cache.load_current(store.get('shared_version'))
+    if cached is None: return False
+    data, manifest, current = cached
+    old = store['snapshot']
+    store['snapshot'] = build_snapshot(store, data, manifest['loaded_at'], (old['version'] + 1) if old else 1)
+    store['shared_version'], store['shared_manifest'] = current['version'], manifest
+    store['last_attempt_ok'] = True
+    metrics.record_snapshot(store['snapshot'])
+    return True
+
+def take_writer(store):
+    # Jadi penulis: mulai dari versi bersama terakhir (jadwal refresh lanjut dari loaded_at-nya)
+    # dan lanjutkan sinkron incremental master dari situ, bukan full download
+    store['role'] = 'writer'
+    adopt_shared(store)
+    if store.get('shared_manifest') and store['snapshot'] is not None:
+        seed_master_sync(store['shared_manifest'], store['snapshot']['data'][0])
+
+def wait_shared(store):
+    # Cold start pembaca: tunggu versi pertama dari penulis, bukan fetch Google sendiri.
+    # Penulis hilang sebelum sempat publish -> ambil alih; tetap kosong -> pemanggil memuat sendiri
+    deadline = time.time() + SHARED_WAIT_SEC
+    while not adopt_shared(store):
+        if shared_cache.claim_writer():
+            take_writer(store)
+            return
+        if time.time() >= deadline: return
+        time.sleep(1)
+
+def cold_start(store):
+    # Dipanggil dengan load_lock terpegang
+    if shared_cache.ENABLED:
+        if shared_cache.claim_writer(): take_writer(store)
+        else:
+            store['role'] = 'reader'
+            wait_shared(store)
+    if store['snapshot'] is not None: return
+    if not warm_start(store): swap_snapshot(store)
+    # Penulis tanpa versi bersama: snapshot lokal langsung dibagikan, pembaca tidak menunggu refresh berikutnya
+    elif store['role'] == 'writer': publish_shared(store, store['snapshot']['data'], store['snapshot']['loaded_at'])
+
+def follow_shared(store):
+    time.sleep(SHARED_POLL_SEC)
+    try:
+        with store['load_lock']:
+            if shared_cache.claim_writer(): take_writer(store)
+            else: adopt_shared(store)
+    except: pass
+
+def refresher_loop(store):
+    while True:
+        if store['role'] == 'reader':
+            follow_shared(store)
+            continue
+        snap = store['snapshot']
+        wait = REFRESH_INTERVAL_SEC if store.get('last_attempt_ok') else REFRESH_RETRY_SEC
+        due = (snap['loaded_at'] if snap else 0) + wait
+        time.sleep(max(5.0, due - time.time()))
+        try:
+            with store['load_lock']:
+                # Snapshot sudah diganti (versi baru) selama menunggu -> jadwal ulang, jangan fetch lagi
+                if store['snapshot'] is snap: swap_snapshot(store)
+        except: pass
+
+def get_snapshot(app=None, derive_fn=None):
+    # -> (snapshot, store); snapshot['derived'][app] tersedia jika derive_fn diberikan
+    store = get_data_store()
+    metrics.start_metrics_server()
+    if app is not None: store['derivers'][app] = derive_fn
+    if store['snapshot'] is None:
+        with store['load_lock']:
+            if store['snapshot'] is None:
+                cache_miss()
+                with stage('load_data'): cold_start(store)
+    if app is not None and app not in store['snapshot']['derived']:
+        # Aplikasi pertama kali terdaftar setelah snapshot ada -> bangun turunan sekali
+        with store['load_lock']:
+            snap = store['snapshot']
+            if app not in snap['derived']:
+                cache_miss()
+                with stage(f'derive:{app}'): snap['derived'][app] = derive_fn(snap['data'])
+    if store['thread'] is None or not store['thread'].is_alive():
+        with store['thread_lock']:
+            # Cek ulang di dalam lock: session yang datang bersamaan tidak menyalakan refresher kedua
+            if store['thread'] is None or not store['thread'].is_alive():
+                store['thread'] = threading.Thread(target=refresher_loop, args=(store,), daemon=True, name='atm-data-refresher')
+                store['thread'].start()
+    return store['snapshot'], store
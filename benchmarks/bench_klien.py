@@ -0,0 +1,203 @@
+# =========================================================================
+# BENCHMARK JALUR KOMPUTASI DASHBOARD KLIEN (DATA SINTETIS)
+# =========================================================================
+# Mengukur tiap tahap (load+clean, derive, filter, tiering, Critical TIDs, branch pivot,
+# ticker, styling) pada workbook sintetis atm_data.fixture di beberapa ukuran master.
+# Fungsi dashboard di-import dari klien_compute.py (modul yang sama dipakai dashboard_klien.py),
+# jadi yang diukur selalu kode yang sama dengan produksi.
+#
+# Contoh:
+#   python benchmarks/bench_klien.py                                  # 10k, 100k, 1M -> CSV ke stdout
+#   python benchmarks/bench_klien.py --rows 10000,100000 --format json --out bench.json
+#   python benchmarks/bench_klien.py --baseline bench_prev.csv --max-ratio 1.3   # exit 1 jika ada regresi
+#
+# Output: satu baris per (stage, rows, category) -> min / median / max ms + versi kode & library.
+import os
+import sys
+import gc
+import csv
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+import streamlit.logger
+import atm_data
+from atm_data.fixture import generate_book, FixtureClient, CATEGORIES, COMPLAINT_DIST
+from atm_data.loader import load_online
+import klien_compute as kc
+
+streamlit.logger.set_log_level('error')  # cache_resource di luar `streamlit run` -> warning ScriptRunContext
+
+STAGES = ['generate', 'load_clean', 'refresh_incremental', 'derive', 'filter', 'tiering', 'critical_tids', 'branch_pivot', 'ticker', 'styling']
+FIELDS = ['stage', 'rows', 'category', 'repeat', 'min_ms', 'median_ms', 'max_ms', 'out_rows', 'baseline_ms', 'ratio',
+          'git_rev', 'python', 'pandas', 'timestamp']
+
+# --- TIMER (GC DIMATIKAN SELAMA PENGUKURAN, SEPERTI timeit) ---
+def timed(fn, repeat):
+    times, out = [], None
+    for i in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            out = fn(i)
+            times.append((time.perf_counter() - t0) * 1000)
+        finally: gc.enable()
+    return times, out
+
+def out_len(value):
+    if isinstance(value, tuple): value = value[0]
+    if isinstance(value, (pd.DataFrame, pd.Series, list, str)): return len(value)
+    return ''
+
+def git_rev():
+    try: return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+    except: return ''
+
+# --- SKENARIO PER UKURAN MASTER ---
+def run_size(rows, args, meta):
+    results = []
+    def record(stage, times, out=None):
+        results.append({'stage': stage, 'rows': rows, 'category': args.category, 'repeat': len(times),
+                        'min_ms': round(min(times), 3), 'median_ms': round(statistics.median(times), 3), 'max_ms': round(max(times), 3),
+                        'out_rows': out_len(out), **meta})
+        print(f"  {stage:<20} {statistics.median(times):>12.2f} ms", file=sys.stderr)
+        return out
+
+    def gen_book(i):
+        return generate_book(rows, seed=args.seed, tids=args.tids, branches=args.branches, months=args.months,
+                             categories=args.categories, complaints=args.complaints)
+
+    # Generator sekali saja (bukan jalur dashboard, dicatat agar waktu total bisa dijelaskan)
+    times, book = timed(gen_book, 1)
+    record('generate', times, book[atm_data.SHEET_MAIN])
+
+    # 1. LOAD + CLEAN: grid sheet -> master/SLM/MRI/blok (jalur data_from_book = parse + clean + schema)
+    times, data = timed(lambda i: atm_data.data_from_book(book, 'BENCH'), args.repeat)
+    record('load_clean', times, data[0])
+
+    # 2. REFRESH INCREMENTAL: load_online via FixtureClient setelah satu full sync; master tumbuh tiap fetch
+    atm_data.get_master_sync_state.clear()
+    grow_book = {k: [list(r) for r in v] if k == atm_data.SHEET_MAIN else v for k, v in book.items()}
+    client = FixtureClient(grow_book, {'growth': max(1, rows // 1000), 'latency': 0, 'quota_rate': 0, 'error_rate': 0, 'missing': []})
+    load_online(client)
+    times, fresh = timed(lambda i: load_online(client), args.repeat)
+    record('refresh_incremental', times, fresh[0])
+    atm_data.get_master_sync_state.clear()
+    del grow_book, client, fresh
+
+    # 3. DERIVE: cube tiket + index TID/SLM (sekali per versi data di refresher)
+    times, derived = timed(lambda i: kc.build_derived(data), args.repeat)
+    record('derive', times, derived['cube']['frame'])
+    cube, slm_index = derived['cube'], derived['slm_index']
+
+    # Bulan aktif = bulan terakhir di master (append-only), pembanding = bulan sebelumnya
+    sel_mon = str([m for m in cube['months'] if pd.notna(m)][-1])
+    prev_mon = kc.get_prev_month_full_en(sel_mon)
+    prev_col, total_col = f"{prev_mon[:3]} (Prev)", f'Σ {sel_mon[:3]}'
+    measure = 'SUM' if args.category == 'Complain' and cube['has_sum'] else 'N'
+    cats = [args.category]
+
+    # 4. FILTER KATEGORI / BULAN (potongan cube bulan aktif + bulan lalu)
+    times, (curr, prev) = timed(lambda i: (kc.cube_slice(cube, sel_mon, cats), kc.cube_slice(cube, prev_mon, cats)), args.repeat)
+    record('filter', times, curr)
+
+    # 5. TIERING
+    times, out = timed(lambda i: kc.build_tier_table(curr, prev, measure, prev_col, total_col), args.repeat)
+    record('tiering', times, out)
+
+    # 6. CRITICAL TIDS PIVOT (+ flag NO SLM)
+    times, (top_all, tids_view) = timed(lambda i: kc.vm_critical_tids(curr, prev, measure, prev_col, total_col, 'All Week', kc.slm_counts(slm_index, sel_mon)), args.repeat)
+    record('critical_tids', times, tids_view)
+
+    # 7. BRANCH PIVOT (tren W1 vs W2)
+    times, out = timed(lambda i: kc.vm_branch_trend(curr, prev, measure, prev_col, total_col, 'W1 vs W2'), args.repeat)
+    record('branch_pivot', times, out.get('table') if isinstance(out, dict) else out)
+
+    # 8. TICKER: token unik per ulangan -> selalu cache miss (yang diukur pembangunan HTML-nya)
+    snapshot = {'derived': {'klien': derived}}
+    times, out = timed(lambda i: kc.build_ticker_html(('bench', rows, i, time.time()), sel_mon, 'All Week', args.category, snapshot), args.repeat)
+    record('ticker', times, out[0] if isinstance(out, tuple) else out)
+
+    # 9. STYLING: styler tabel Critical TIDs (warna ON) sampai render HTML
+    times, out = timed(lambda i: kc.style_table(tids_view, use_color=True, prev_col=prev_col, total_col=total_col).to_html(), args.repeat)
+    record('styling', times, tids_view)
+    return results
+
+# --- BASELINE (HASIL RILIS SEBELUMNYA) ---
+def read_table(path):
+    if path.endswith('.json'):
+        with open(path, encoding='utf-8') as f: return json.load(f)
+    with open(path, newline='', encoding='utf-8') as f: return list(csv.DictReader(f))
+
+def apply_baseline(results, path):
+    base = {(r['stage'], str(r['rows']), r['category']): float(r['median_ms']) for r in read_table(path) if r.get('median_ms') not in (None, '')}
+    for r in results:
+        b = base.get((r['stage'], str(r['rows']), r['category']))
+        r['baseline_ms'] = b if b is not None else ''
+        r['ratio'] = round(r['median_ms'] / b, 3) if b else ''
+    return results
+
+def write_table(results, fmt, path=None):
+    f = open(path, 'w', newline='', encoding='utf-8') if path else sys.stdout
+    try:
+        if fmt == 'json': json.dump(results, f, indent=2, ensure_ascii=False); f.write('\n')
+        else:
+            w = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+            w.writeheader()
+            w.writerows(results)
+    finally:
+        if path: f.close()
+
+def parse_complaints(text):
+    # "1:3,2:1,3:1,-:1" -> {'1': 3.0, ...} (bobot nilai JUMLAH_COMPLAIN)
+    return {k.strip(): float(v) for k, v in (part.rsplit(':', 1) for part in text.split(',') if part.strip())}
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='Benchmark tahap komputasi dashboard klien pada data sintetis.')
+    p.add_argument('--rows', default='10000,100000,1000000', help='ukuran master (baris), dipisah koma')
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--category', default='Elastic', help='kategori yang difilter (Complain -> measure SUM)')
+    p.add_argument('--stages', default=','.join(STAGES), help='hanya tampilkan stage ini di output')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--tids', type=int, default=None, help='jumlah TID unik (default rows // 20)')
+    p.add_argument('--branches', type=int, default=24)
+    p.add_argument('--months', type=int, default=4, help='bulan kalender yang dicakup, termasuk bulan berjalan')
+    p.add_argument('--categories', default=','.join(CATEGORIES))
+    p.add_argument('--complaints', default=','.join(f"{k}:{v}" for k, v in COMPLAINT_DIST.items()), help='distribusi JUMLAH_COMPLAIN nilai:bobot')
+    p.add_argument('--format', choices=['csv', 'json'], default='csv')
+    p.add_argument('--out', default=None, help='file output (default stdout)')
+    p.add_argument('--baseline', default=None, help='hasil sebelumnya (csv/json) untuk kolom ratio')
+    p.add_argument('--max-ratio', type=float, default=None, help='exit 1 jika ada ratio median melebihi nilai ini')
+    args = p.parse_args(argv)
+    args.categories = [c.strip() for c in args.categories.split(',') if c.strip()]
+    args.complaints = parse_complaints(args.complaints)
+    if args.category not in args.categories: p.error(f"--category {args.category} tidak ada di --categories")
+
+    meta = {'baseline_ms': '', 'ratio': '', 'git_rev': git_rev(), 'python': platform.python_version(), 'pandas': pd.__version__,
+            'timestamp': datetime.now().isoformat(timespec='seconds')}
+    keep = set(s.strip() for s in args.stages.split(','))
+    results = []
+    for rows in [int(float(x)) for x in args.rows.split(',') if x.strip()]:
+        print(f"[{rows:,} rows]", file=sys.stderr)
+        results += [r for r in run_size(rows, args, meta) if r['stage'] in keep]
+        gc.collect()
+
+    if args.baseline: apply_baseline(results, args.baseline)
+    write_table(results, args.format, args.out)
+    if args.max_ratio is not None:
+        worse = [r for r in results if r['ratio'] != '' and r['ratio'] > args.max_ratio]
+        for r in worse: print(f"REGRESI: {r['stage']} @ {r['rows']:,} rows  {r['baseline_ms']} -> {r['median_ms']} ms (x{r['ratio']})", file=sys.stderr)
+        return 1 if worse else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+import streamlit as st
+
+# =========================================================================
+# ENTRY POINT SATU PROSES: DASHBOARD KLIEN + DASHBOARD ATM
+# =========================================================================
+# streamlit run dashboard.py -> kedua halaman dilayani satu proses Streamlit, jadi berbagi satu
+# store atm_data (satu refresher, satu fetch Google, satu salinan data di memori).
+#   /     : dashboard_klien.py
+#   /atm  : dashboard_atm.py
+# Navigasi disembunyikan: tiap halaman tampil persis seperti saat dijalankan sendiri (header
+# Streamlit disembunyikan CSS halaman), pindah halaman lewat URL.
+# dashboard_klien.py / dashboard_atm.py tetap bisa dijalankan sebagai proses terpisah, tapi tiap
+# proses memuat sendiri; berbagi data antar proses / replika butuh ATM_SHARED_DIR (atm_data/shared_cache.py).
+pages = [
+    st.Page('dashboard_klien.py', title="ATM Performance Dashboard", icon="📊", default=True),
+    st.Page('dashboard_atm.py', title="ATM Performance Monitoring", icon="🏧", url_path='atm'),
+]
+st.navigation(pages, position='hidden').run()
@@ -0,0 +1,535 @@
+import sys
+import html
+import threading
+from collections import OrderedDict
+import pandas as pd
+import streamlit as st
+import atm_data
+from atm_data import plain_keys, frame_mem_bytes, profiling
+
+# =========================================================================
+# KOMPUTASI DASHBOARD KLIEN (CUBE, INDEX, TIERING, TICKER, VIEW MODEL, STYLER)
+# =========================================================================
+# Dipisah dari dashboard_klien.py supaya bisa di-import tanpa menjalankan halaman:
+# benchmarks/bench_klien.py mengukur fungsi yang sama persis dengan yang dipakai produksi.
+# Tidak membaca variabel halaman -> toggle warna & nama kolom bulan dioper sebagai argumen.
+# --- HELPER FUNCTIONS (GLOBAL) ---
+def get_prev_month_full_en(curr_month_en):
+    months = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
+    try: idx = months.index(curr_month_en); return months[idx - 1] if idx > 0 else months[11]
+    except: return None
+
+def clean_zeros(df_in):
+    # Khusus blok teks dari sheet (Follow-up dll)
+    return df_in.astype(str).replace(['0', '0.0', '0.00', 'nan', 'None'], '')
+
+# --- TAMPILAN TABEL NUMERIK ---
+# Kolom angka tetap numerik sampai ke frontend (Arrow ringkas, sort di browser numerik);
+# nol / kosong cukup disembunyikan lewat format Styler, tanpa salinan string satu frame penuh.
+def fmt_blank_zero(v, pattern='{}'):
+    if v is None or (pd.api.types.is_scalar(v) and pd.isna(v)): return ''
+    if pd.api.types.is_number(v): return '' if v == 0 else pattern.format(v)
+    return str(v)
+
+def style_numeric(df_in, formats=None):
+    # Kolom teks bisa membawa 0 sisa fillna(0) merge -> kosongkan supaya tetap satu tipe string di Arrow
+    obj_cols = [c for c in df_in.columns if df_in[c].dtype == object]
+    if obj_cols: df_in = df_in.assign(**{c: df_in[c].replace(0, '') for c in obj_cols})
+    text_cols = [c for c in df_in.columns if not pd.api.types.is_bool_dtype(df_in[c])]
+    styler = df_in.style.format(fmt_blank_zero, subset=text_cols)
+    for col, pattern in (formats or {}).items():
+        if col in df_in.columns: styler = styler.format(lambda v, p=pattern: fmt_blank_zero(v, p), subset=[col])
+    return styler
+
+def style_table(df_in, formats=None, use_color=False, prev_col=None, total_col=None):
+    # Styler universal tabel halaman. use_color = toggle 🎨, prev_col / total_col = kolom bulan lalu
+    # & total bulan ini (mis. "Dec (Prev)" / "Σ Jan") yang selalu diberi latar.
+    # 1. Create Base Styler (angka tetap numerik, nol disembunyikan lewat format)
+    styler = style_numeric(df_in, formats)
+
+    # 2. Logic Warna Merah/Hijau (Jika toggle ON)
+    if use_color:
+        # Mask naik/turun W1->W2->W3->W4 dihitung sekali di frame numerik -> satu matriks CSS (axis=None)
+        color_bad = 'color: #B91C1C; font-weight: 700;' 
+        color_good = 'color: #15803D; font-weight: 700;' 
+        chain = [(c, p) for c, p in [('W2', 'W1'), ('W3', 'W2'), ('W4', 'W3')] if c in df_in.columns and p in df_in.columns]
+        if chain:
+            try:
+                num = df_in[sorted({w for pair in chain for w in pair})].apply(pd.to_numeric, errors='coerce').fillna(0)
+                css = pd.DataFrame('', index=df_in.index, columns=df_in.columns)
+                for week_col, base_col in chain:
+                    css.loc[(num[week_col] > num[base_col]).to_numpy(), week_col] = color_bad
+                    css.loc[(num[week_col] < num[base_col]).to_numpy(), week_col] = color_good
+                styler = styler.apply(lambda _: css, axis=None)
+            except: pass
+
+    # 3. Logic Warna Kolom (Dec & Jan) - UNIVERSAL (Always On)
+    # Prev Month (Dec) -> Very subtle Grey
+    if prev_col in df_in.columns:
+        styler = styler.map(lambda x: 'background-color: #F9FAFB; color: #444;', subset=[prev_col])
+    
+    # Current Total (Jan) -> Very subtle Blue + Bold
+    if total_col in df_in.columns:
+        styler = styler.map(lambda x: 'background-color: #F0F9FF; color: #000; font-weight: 600;', subset=[total_col])
+
+    return styler
+
+# --- CUBE TIKET (AGREGAT SEKALI PER VERSI DATA) ---
+# Satu baris per kombinasi (bulan, kategori, flag MRI, week, TID, lokasi, cabang, type MRI):
+# N = jumlah baris tiket, SUM = total JUMLAH_COMPLAIN, FIRST/LAST = posisi baris pertama/terakhir
+# di master (urutan seri & lookup "baris pertama/terakhir" sama seperti di data mentah).
+# View cukup ambil potongan cube per (bulan, kategori) -> tidak ada groupby ulang atas histori.
+CUBE_KEYS = ['BULAN_EN', 'KATEGORI', 'IS_MRI', 'WEEK', 'WEEK_NUM', 'TID', 'LOKASI', 'CABANG', 'TYPE MRI']
+
+def build_ticket_cube(df_in):
+    has_sum = 'JUMLAH_COMPLAIN' in df_in.columns
+    if df_in.empty or 'BULAN_EN' not in df_in.columns or 'KATEGORI' not in df_in.columns:
+        frame = pd.DataFrame(columns=CUBE_KEYS + ['N', 'SUM', 'FIRST', 'LAST'])
+        return {'frame': frame, 'parts': {}, 'has_sum': has_sum, 'months': [], 'cols': set(df_in.columns)}
+
+    col_status = next((c for c in df_in.columns if 'STATUS' in c and 'MRI' in c), 'STATUS MRI')
+    base = pd.DataFrame(index=df_in.index)
+    for k in CUBE_KEYS:
+        if k == 'IS_MRI': base[k] = (df_in[col_status] == 'TID MRI') if col_status in df_in.columns else False
+        elif k in df_in.columns: base[k] = df_in[k]
+        elif k == 'WEEK_NUM': base[k] = 0
+        else: base[k] = pd.Series(pd.NA, index=df_in.index, dtype='category')
+    base['SUM'] = df_in['JUMLAH_COMPLAIN'].astype('int64') if has_sum else 0
+    base['POS'] = range(len(df_in))
+
+    # dropna=False: baris dengan key kosong tetap dihitung di total (len() di data mentah)
+    frame = base.groupby(CUBE_KEYS, observed=True, dropna=False).agg(
+        N=('POS', 'size'), SUM=('SUM', 'sum'), FIRST=('POS', 'min'), LAST=('POS', 'max')).reset_index()
+    parts = frame.groupby(['BULAN_EN', 'KATEGORI'], observed=True).indices
+    return {'frame': frame, 'parts': parts, 'has_sum': has_sum, 'months': df_in['BULAN_EN'].unique().tolist(), 'cols': set(df_in.columns)}
+
+def cube_slice(cube, month, cats, mri=None, week_limit=None):
+    # Potongan cube untuk 1 bulan & beberapa kategori (lookup dict, bukan scan histori)
+    idx = [cube['parts'][(month, c)] for c in cats if (month, c) in cube['parts']]
+    if not idx: return cube['frame'].iloc[0:0]
+    out = cube['frame'].take(idx[0] if len(idx) == 1 else sorted(i for part in idx for i in part))
+    if mri is not None: out = out[out['IS_MRI'] == mri]
+    if week_limit is not None: out = out[out['WEEK_NUM'] <= week_limit]
+    return out
+
+def cube_rows(cube, cats, mri=None):
+    # Semua bulan untuk kategori tertentu (ticker & lookup lokasi TID)
+    frame = cube['frame']
+    out = frame[frame['KATEGORI'].isin(cats)]
+    if mri is not None: out = out[out['IS_MRI'] == mri]
+    return out
+
+def cube_counts(part, key, measure, order='key'):
+    # order='key'  -> seperti groupby(key)[..].sum() (urut key)
+    # order='count'-> seperti value_counts() (terbesar dulu, seri = kemunculan pertama)
+    if part.empty: return pd.Series(dtype='int64')
+    grp = part.groupby(key, observed=True).agg(VAL=(measure, 'sum'), FIRST=('FIRST', 'min'))
+    if order == 'count': grp = grp.sort_values(['VAL', 'FIRST'], ascending=[False, True], kind='stable')
+    return grp['VAL'].astype('int64')
+
+def cube_pivot(part, index, measure):
+    # Setara pivot_table(index, columns='WEEK', aggfunc size/sum) di data mentah
+    return plain_keys(part.pivot_table(index=index, columns='WEEK', values=measure, aggfunc='sum', fill_value=0, observed=True).reset_index())
+
+# --- INDEX TID (DRILL-DOWN & LOOKUP LOKASI) ---
+# TID -> posisi baris di master (urut naik) + waktu problem terakhir & LOKASI/CABANG baris terbaru.
+# Detail TID cukup ambil baris di posisi itu (tidak scan seluruh histori).
+def build_tid_index(df_in):
+    meta_cols = ['LAST_TS', 'LOKASI', 'CABANG']
+    if df_in.empty or 'TID' not in df_in.columns: return {'pos': {}, 'meta': pd.DataFrame(columns=meta_cols)}
+    grp = df_in.groupby('TID', observed=True)
+    meta = grp.tail(1).set_index('TID').reindex(columns=['LOKASI', 'CABANG'])
+    col_time = 'TANGGAL' if 'TANGGAL' in df_in.columns else ('WAKTU_INSERT' if 'WAKTU_INSERT' in df_in.columns else None)
+    meta.insert(0, 'LAST_TS', grp[col_time].max() if col_time else pd.NaT)
+    return {'pos': grp.indices, 'meta': plain_keys(meta)}
+
+def tid_rows(df_in, tid_index, tid):
+    pos = tid_index['pos'].get(tid)
+    return df_in.iloc[pos] if pos is not None else df_in.iloc[0:0]
+
+# --- INDEX SLM VISIT LOG ---
+# Log kunjungan diurutkan sekali (TGL_VISIT terbaru dulu) lalu dikelompokkan per (TID, BULAN_EN):
+# N kunjungan terakhir & jumlah kunjungan per TID tinggal ambil dari dict, tanpa filter ulang log.
+def build_slm_index(df_slm):
+    if df_slm.empty or 'TGL_VISIT' not in df_slm.columns:
+        return {'frame': df_slm, 'pos': {}, 'counts': pd.Series(dtype='int64')}
+    ordered = df_slm.sort_values('TGL_VISIT', ascending=False, kind='stable').reset_index(drop=True)
+    grp = ordered.groupby(['TID', 'BULAN_EN'], sort=False)
+    return {'frame': ordered, 'pos': grp.indices, 'counts': grp.size()}
+
+def slm_visits(slm_index, tid, month, n=2):
+    pos = slm_index['pos'].get((tid, month))
+    return slm_index['frame'].iloc[pos[:n]] if pos is not None else slm_index['frame'].iloc[0:0]
+
+def slm_counts(slm_index, month):
+    # TID -> jumlah kunjungan SLM di bulan tsb
+    counts = slm_index['counts']
+    if counts.empty: return pd.Series(dtype='int64')
+    return counts.xs(month, level='BULAN_EN') if month in counts.index.get_level_values('BULAN_EN') else pd.Series(dtype='int64')
+
+# --- ENGINE TIERING RISIKO ---
+# (label, batas bawah) berurutan; bin = [batas, batas berikutnya). Tambah tier cukup di sini,
+# mis. ('>5x Kali', 6) -> tabel & baris TOTAL UNIT ikut menyesuaikan.
+TIER_RULES = [('1x Kali', 1), ('2-3x Kali', 2), ('>3x Kali', 4)]
+TIER_RULES_MRI = [('1 kali', 1), ('2-3 kali', 2), ('> 3 kali', 4)]
+TIER_WEEKS = ['W1', 'W2', 'W3', 'W4']
+
+def build_tier_table(curr, prev, measure, prev_col, total_col, rules=TIER_RULES):
+    # Total per TID untuk bulan lalu, tiap week & sebulan dalam 1 groupby, lalu di-bin sekaligus
+    per = pd.concat([curr.assign(PERIOD=curr['WEEK'].astype(object).fillna('')), prev.assign(PERIOD=prev_col)], ignore_index=True)
+    per = per.dropna(subset=['TID'])
+    wide = per.groupby(['TID', 'PERIOD'], observed=True)[measure].sum().unstack('PERIOD', fill_value=0) if not per.empty else pd.DataFrame()
+    curr_periods = [c for c in wide.columns if c != prev_col]
+
+    empty = pd.Series(dtype='int64')
+    per_tid = {prev_col: wide.get(prev_col, empty)}
+    per_tid.update({w: wide.get(w, empty) for w in TIER_WEEKS})
+    per_tid[total_col] = wide[curr_periods].sum(axis=1) if curr_periods else empty
+
+    labels = [label for label, _ in rules]
+    bins = [lower for _, lower in rules] + [float('inf')]
+    table = pd.DataFrame({c: pd.cut(v, bins, right=False, labels=labels).value_counts().reindex(labels, fill_value=0).astype('int64') for c, v in per_tid.items()})
+    table.loc['TOTAL UNIT'] = table.sum()
+    return table.rename_axis('TIERING').reset_index()
+
+def cube_tid_meta(part, how='first'):
+    # LOKASI/CABANG per TID dari baris pertama ('first') / terakhir ('last') di data mentah
+    if part.empty: return pd.DataFrame(columns=['LOKASI', 'CABANG'])
+    pos_col = 'FIRST' if how == 'first' else 'LAST'
+    rows = part.sort_values(pos_col, kind='stable').drop_duplicates('TID', keep='first' if how == 'first' else 'last')
+    return plain_keys(rows[['TID', 'LOKASI', 'CABANG']].dropna(subset=['TID'])).set_index('TID')
+
+# --- TICKER HEADER (SEKALI PER VERSI DATA + BULAN/WEEK/KATEGORI, DIPAKAI SEMUA SESSION) ---
+def safe_text(s):
+    if pd.isna(s) or s == "": return "N/A"
+    return html.escape(str(s)).replace("'", "").replace('"', "")
+
+def ticker_delta(curr, prev):
+    # Selisih curr - prev sejajar di gabungan key (key curr dulu, lalu key yang hanya ada di prev)
+    curr = curr.set_axis(curr.index.astype(object)); prev = prev.set_axis(prev.index.astype(object))
+    keys = curr.index.append(prev.index.difference(curr.index, sort=False))
+    v1 = curr.reindex(keys, fill_value=0); v0 = prev.reindex(keys, fill_value=0)
+    diff = v1 - v0
+    pct = (diff / v0.where(v0 > 0) * 100).fillna((v1 > 0) * 100.0)
+    return pd.DataFrame({'DIFF': diff, 'PCT': pct, 'VAL': v1})
+
+@st.cache_resource(show_spinner=False, max_entries=256)
+def build_ticker_html(data_token, h_mon, h_week, h_cat, _snapshot):
+    profiling.cache_miss()  # badan hanya jalan saat cache miss
+    ticket_cube = _snapshot['derived']['klien']['cube']; tid_index = _snapshot['derived']['klien']['tid_index']
+
+    # --- FIX: LOGIKA HITUNG HEADER AGAR KONSISTEN ---
+    # Semua angka ticker diambil dari cube (N = baris, SUM = JUMLAH_COMPLAIN)
+    def get_val_safe(dframe, cat_name):
+        if dframe.empty: return 0
+        try:
+            # JIKA KATEGORI ADALAH COMPLAIN, WAJIB SUM KOLOM J
+            if cat_name == 'Complain': return int(dframe['SUM'].sum())
+            
+            # JIKA KATEGORI LAIN, HITUNG JUMLAH BARIS
+            return int(dframe['N'].sum())
+        except:
+            return 0
+
+    cat_label = h_cat.upper()
+    total_armada = 611 
+    tid_measure = 'SUM' if h_cat == 'Complain' and ticket_cube['has_sum'] else 'N'
+    order = 'key' if tid_measure == 'SUM' else 'count'
+    
+    if h_cat == 'MRI Project':
+        h_cats, h_mri = ['Complain', 'DF Repeat'], True
+        cat_label = "PROJECT MRI"
+    elif h_cat == 'SparePart & Kaset':
+        h_cats, h_mri = [], None; cat_label = "SPAREPART"
+    else:
+        h_cats, h_mri = [h_cat], None
+    df_target = cube_rows(ticket_cube, h_cats, mri=h_mri)
+
+    # --- INISIALISASI LIST UPDATES DENGAN SIGNATURE MESSAGE (URUTAN 0) ---
+    updates = [f"<span style='font-family: monospace; color: #64748B;'>&gt;_ SYSTEM_ORIGIN:</span> <span style='color: #1E293B; font-weight: 800; letter-spacing: 0.5px;'>COMMAND CENTER LT 3 GEDUNG BRI</span>"]
+    
+    if not df_target.empty:
+        months_list = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
+        try: idx_m = months_list.index(h_mon); h_prev_mon = months_list[idx_m - 1] if idx_m > 0 else months_list[11]
+        except: h_prev_mon = ""
+
+        df_curr_m = cube_slice(ticket_cube, h_mon, h_cats, mri=h_mri)
+        df_prev_m = cube_slice(ticket_cube, h_prev_mon, h_cats, mri=h_mri)
+
+        is_weekly_mode = (h_week != 'All Week')
+        scope_label = h_week if is_weekly_mode else "MONTHLY"
+        
+        if is_weekly_mode:
+            try: w_num = int(h_week.replace('W','')); prev_w_str = f"W{w_num-1}" if w_num > 1 else ""
+            except: prev_w_str = ""
+            df_scope_curr = df_curr_m[df_curr_m['WEEK'] == h_week]
+            df_scope_prev = df_curr_m[df_curr_m['WEEK'] == prev_w_str] if prev_w_str else pd.DataFrame()
+        else:
+            df_scope_curr = df_curr_m; df_scope_prev = df_prev_m
+
+        # MONTHLY
+        val_m_curr = get_val_safe(df_curr_m, h_cat)
+        val_m_prev = get_val_safe(df_prev_m, h_cat)
+        diff_m = val_m_curr - val_m_prev
+        pct_m = (diff_m / val_m_prev * 100) if val_m_prev > 0 else 100.0 if val_m_curr > 0 else 0.0
+        icon_m = "🔺" if diff_m > 0 else "🔻"; color_m = "#DC2626" if diff_m > 0 else "#16A34A"
+        updates.append(f"<span style='color: #64748B;'>[MONTHLY] Total {cat_label}: <b>{val_m_curr}</b> Tiket (<span style='color: {color_m}; font-weight: 800;'>{icon_m} {diff_m} / {pct_m:.1f}%</span> vs {h_prev_mon})</span>")
+
+        # SUMMARY
+        val_s_curr = get_val_safe(df_scope_curr, h_cat)
+        val_s_prev = get_val_safe(df_scope_prev, h_cat)
+        diff_s = val_s_curr - val_s_prev
+        pct_s = (diff_s / val_s_prev * 100) if val_s_prev > 0 else 100.0 if val_s_curr > 0 else 0.0
+        diff_str = f"+{diff_s}" if diff_s > 0 else str(diff_s)
+        pct_str = f"+{pct_s:.1f}%" if pct_s > 0 else f"{pct_s:.1f}%"
+        color_s = "#DC2626" if diff_s > 0 else "#16A34A"
+        updates.append(f"<span style='color: #64748B;'>[{scope_label}] Kategori {cat_label}: <b>{val_s_curr}</b> Tiket. Selisih: <span style='color: {color_s}; font-weight: 800;'>{diff_str} ({pct_str})</span> vs periode lalu.</span>")
+
+        # RECURRING
+        if is_weekly_mode and not df_scope_curr.empty and not df_scope_prev.empty and 'TID' in ticket_cube['cols']:
+            # urut posisi baris pertama -> isi set sama seperti dari data mentah
+            tids_now = set(df_scope_curr.sort_values('FIRST')['TID']); tids_bef = set(df_scope_prev.sort_values('FIRST')['TID'])
+            rec_tids = tids_now.intersection(tids_bef)
+            cnt_rec = len(rec_tids)
+            if cnt_rec > 0:
+                top_rec_list = [safe_text(x) for x in list(rec_tids)[:3]]
+                top_rec_str = ", ".join(top_rec_list)
+                updates.append(f"<span style='color: #64748B;'>[RECURRING] Waspada! Ada <span style='color: #F59E0B; font-weight: 800;'>{cnt_rec} Unit</span> Masalah Berulang dari {prev_w_str} ke {h_week}. (Contoh: {top_rec_str}...)</span>")
+
+        # BRANCH TREND (selisih vektor: reindex + kurang + idxmax/idxmin)
+        if 'CABANG' in ticket_cube['cols']:
+            df_cd = ticker_delta(cube_counts(df_scope_curr, 'CABANG', tid_measure, order=order), cube_counts(df_scope_prev, 'CABANG', tid_measure, order=order))
+            if not df_cd.empty:
+                if df_cd['DIFF'].max() > 0:
+                    cab = df_cd['DIFF'].idxmax(); worst_c = df_cd.loc[cab]
+                    updates.append(f"<span style='color: #64748B;'>[BRANCH RISE] Cabang <b>{safe_text(cab)}</b> ({cat_label}) NAIK <span style='color: #DC2626; font-weight: 800;'>+{int(worst_c['DIFF'])}</span> Tiket (+{worst_c['PCT']:.0f}%) Total: {int(worst_c['VAL'])}.</span>")
+                if df_cd['DIFF'].min() < 0:
+                    cab = df_cd['DIFF'].idxmin(); best_c = df_cd.loc[cab]
+                    updates.append(f"<span style='color: #64748B;'>[BRANCH DROP] Cabang <b>{safe_text(cab)}</b> ({cat_label}) TURUN <span style='color: #16A34A; font-weight: 800;'>{int(best_c['DIFF'])}</span> Tiket ({best_c['PCT']:.0f}%) Total: {int(best_c['VAL'])}.</span>")
+
+        # TID TREND
+        if 'TID' in ticket_cube['cols']:
+            def get_loc_info(tid_target):
+                try:
+                    row = tid_index['meta'].loc[tid_target]
+                    return f"{safe_text(row.get('LOKASI',''))} ({safe_text(row.get('CABANG',''))})"
+                except: return "Lokasi N/A"
+
+            df_td = ticker_delta(cube_counts(df_scope_curr, 'TID', tid_measure, order=order), cube_counts(df_scope_prev, 'TID', tid_measure, order=order))
+            if not df_td.empty:
+                if df_td['DIFF'].max() > 0:
+                    tid = df_td['DIFF'].idxmax(); worst_t = df_td.loc[tid]
+                    updates.append(f"<span style='color: #64748B;'>[TID RISE] Unit <b>{safe_text(tid)}</b> [{get_loc_info(tid)}] NAIK <span style='color: #DC2626; font-weight: 800;'>+{int(worst_t['DIFF'])}</span> Problem (+{worst_t['PCT']:.0f}%) Total: {int(worst_t['VAL'])}x.</span>")
+                if df_td['DIFF'].min() < 0:
+                    tid = df_td['DIFF'].idxmin(); best_t = df_td.loc[tid]
+                    updates.append(f"<span style='color: #64748B;'>[TID DROP] Unit <b>{safe_text(tid)}</b> [{get_loc_info(tid)}] TURUN <span style='color: #16A34A; font-weight: 800;'>{int(best_t['DIFF'])}</span> Problem ({best_t['PCT']:.0f}%) Total: {int(best_t['VAL'])}x.</span>")
+
+    # UPDATE GLOBAL ASSET (Ditaruh di akhir)
+    updates.append(f"<span style='color: #64748B;'>🌍 GLOBAL ASSETS: <span style='color: #1E293B; font-weight: 800;'>{total_armada}</span> Units Active</span>")
+
+    msg_count = len(updates)
+    TIME_SHOW = 8.0; TIME_GAP = 12.0; CYCLE_TIME = TIME_SHOW + TIME_GAP
+    TOTAL_DURATION = max(msg_count * CYCLE_TIME, 1)
+    PCT_VISIBLE = (TIME_SHOW / TOTAL_DURATION) * 100
+    
+    fade_html = ""
+    for i, item in enumerate(updates):
+        delay = i * CYCLE_TIME
+        fade_html += f'<div class="whisper-item" style="animation-delay: {delay}s; animation-duration: {TOTAL_DURATION}s;">{item}</div>'
+    return fade_html, PCT_VISIBLE, TOTAL_DURATION
+
+# --- VIEW MODEL PER SECTION (MEMO LRU PER VERSI DATA + FILTER, DIPAKAI BERSAMA ANTAR SESSION) ---
+# Hasil hitung tiap section (angka ringkasan, pivot, merge, sort) disimpan per
+# (token data, kategori, bulan, week[, mode tren]). Toggle warna / tema hanya membangun ulang
+# Styler dari view model yang sama. Frame di cache dibagi antar session -> JANGAN dimutasi saat render.
+VIEW_CACHE_MAX_BYTES = 128 * 1024 * 1024
+VIEW_CACHE_MAX_ITEMS = 512
+
+@st.cache_resource(show_spinner=False)
+def get_view_cache():
+    return {'lock': threading.Lock(), 'items': OrderedDict(), 'bytes': 0}
+
+def view_bytes(value):
+    if isinstance(value, pd.DataFrame): return frame_mem_bytes(value)
+    if isinstance(value, pd.Series): return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict): return sum(view_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)): return sum(view_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+def view_model(section, key, build_fn):
+    # Tiap section tercatat di profiler sebagai stage 'vm:<section>' (hit / miss)
+    with profiling.stage(f'vm:{section}', cached=True):
+        cache = get_view_cache(); item_key = (section,) + tuple(key)
+        def lookup():
+            with cache['lock']:
+                hit = cache['items'].get(item_key)
+                if hit is not None: cache['items'].move_to_end(item_key)
+                return hit
+
+        def build_and_store():
+            # Cek ulang: leader sebelumnya bisa saja baru selesai menyimpan
+            hit = lookup()
+            if hit is not None: return hit[0]
+            value = build_fn()
+            size = view_bytes(value)
+            with cache['lock']:
+                if item_key not in cache['items'] and size <= VIEW_CACHE_MAX_BYTES:
+                    cache['items'][item_key] = (value, size); cache['bytes'] += size
+                    # LRU: buang yang paling lama tidak dipakai sampai di bawah batas jumlah & memori
+                    while len(cache['items']) > VIEW_CACHE_MAX_ITEMS or cache['bytes'] > VIEW_CACHE_MAX_BYTES:
+                        _, (_, old_size) = cache['items'].popitem(last=False)
+                        cache['bytes'] -= old_size
+            return value
+
+        hit = lookup()
+        if hit is not None:
+            profiling.set_rows(hit[0])
+            return hit[0]
+        profiling.cache_miss()
+        # Single-flight: session lain yang miss di kunci sama menunggu hasil ini (tidak menghitung ulang)
+        value = atm_data.single_flight(item_key, build_and_store, name=section)
+        profiling.set_rows(value)
+        return value
+
+def week_total_row(curr, prev, measure, prev_col, total_col, total_atm):
+    # Satu baris: TOTAL ATM, bulan lalu, W1..W4, total bulan ini
+    row = {'TOTAL ATM': [total_atm], prev_col: [int(prev[measure].sum()) if not prev.empty else 0]}
+    for w in ['W1', 'W2', 'W3', 'W4']: row[w] = [int(curr.loc[curr['WEEK'] == w, measure].sum()) if not curr.empty else 0]
+    row[total_col] = [sum(row[w][0] for w in ['W1', 'W2', 'W3', 'W4'])]
+    return pd.DataFrame(row)
+
+def vm_mri_summary(curr_comp, curr_df, prev_comp, prev_df, df_mri_ops, prev_col, total_col, total_atm):
+    col_visit = next((c for c in df_mri_ops.columns if 'Range' in c or 'Waktu' in c), None)
+    if col_visit:
+        pagi = df_mri_ops[col_visit].str.contains('Pagi', case=False, na=False).sum(); siang = df_mri_ops[col_visit].str.contains('Siang', case=False, na=False).sum(); malam = df_mri_ops[col_visit].str.contains('Malam', case=False, na=False).sum()
+    else: pagi, siang, malam = 0, 0, 0
+    return {
+        'summary': pd.DataFrame({"TOTAL ATM": [total_atm], "Complain": [int(curr_comp['N'].sum())], "DF": [int(curr_df['N'].sum())]}),
+        'jml_comp': week_total_row(curr_comp, prev_comp, 'N', prev_col, total_col, total_atm),
+        'jml_df': week_total_row(curr_df, prev_df, 'N', prev_col, total_col, total_atm),
+        'visit': pd.DataFrame({"TOTAL ATM": [total_atm], "Pagi": [pagi], "Siang": [siang], "Malam": [malam]}),
+    }
+
+def vm_mri_top_tids(curr, prev, measure, prev_col, total_col, sort_week, cube_cols):
+    # Top TID MRI: pivot W1-W4 + bulan lalu (outer), diurutkan sesuai dropdown week
+    # A. Pivot Current Data (W1-W4)
+    if not curr.empty:
+        piv = cube_pivot(curr, ['TID','LOKASI','CABANG','TYPE MRI'], measure)
+    else:
+        piv = pd.DataFrame(columns=['TID','LOKASI','CABANG','TYPE MRI'])
+
+    # B. Prepare Previous Data (Dec)
+    if not prev.empty:
+        prev_grp = plain_keys(cube_counts(prev, 'TID', measure).reset_index())
+        prev_grp.columns = ['TID', prev_col]
+        
+        # Merge Prev to Curr
+        piv = pd.merge(piv, prev_grp[['TID', prev_col]], on='TID', how='outer').fillna(0)
+        
+        # Fill Metadata for rows that only exist in Prev
+        prev_meta = cube_tid_meta(prev, how='last')
+        if 'LOKASI' in cube_cols:
+            lookup_loc = prev_meta['LOKASI'].to_dict()
+            piv['LOKASI'] = piv.apply(lambda r: lookup_loc.get(r['TID'], '') if pd.isna(r['LOKASI']) or r['LOKASI'] == 0 else r['LOKASI'], axis=1)
+        if 'CABANG' in cube_cols:
+            lookup_cab = prev_meta['CABANG'].to_dict()
+            piv['CABANG'] = piv.apply(lambda r: lookup_cab.get(r['TID'], '') if pd.isna(r['CABANG']) or r['CABANG'] == 0 else r['CABANG'], axis=1)
+    else:
+        piv[prev_col] = 0
+
+    # Ensure Columns Exist
+    for w in ['W1','W2','W3','W4']: 
+        if w not in piv.columns: piv[w] = 0
+    
+    # C. Calculate Total Current (Σ Jan)
+    piv[total_col] = piv[['W1','W2','W3','W4']].sum(axis=1)
+    
+    # D. Sorting Dynamic based on Week Dropdown
+    sort_col = total_col # Default Sort
+    if sort_week != 'All Week' and sort_week in piv.columns:
+        sort_col = sort_week
+    
+    # Sort descending based on selected criterion
+    piv = piv.sort_values(sort_col, ascending=False).reset_index(drop=True)
+    
+    # E. Column Ordering
+    cols_show = ['TID', 'LOKASI', 'CABANG', 'TYPE MRI', prev_col, 'W1', 'W2', 'W3', 'W4', total_col]
+    cols_final = [c for c in cols_show if c in piv.columns]
+    
+    # F. Display: numbers to int (nol disembunyikan oleh format)
+    df_disp = piv[cols_final].copy()
+    for c in [prev_col, 'W1', 'W2', 'W3', 'W4', total_col]:
+        if c in df_disp.columns:
+            df_disp[c] = pd.to_numeric(df_disp[c]).fillna(0).astype(int)
+    return piv, df_disp
+
+def vm_overview(curr, prev, measure, prev_col, total_col, total_atm):
+    # KHUSUS COMPLAIN: SUM KOLOM JUMLAH_COMPLAIN, KATEGORI LAIN: COUNT BARIS (measure)
+    overview = week_total_row(curr, prev, measure, prev_col, total_col, total_atm)
+    curr_total = int(overview[total_col].iloc[0])
+    overview['AVG'] = curr_total / 4
+    overview['PROB %'] = (curr_total / total_atm * 100) if total_atm > 0 else 0
+    return overview
+
+def vm_top_locations(curr):
+    loc_counts = plain_keys(cube_counts(curr, 'LOKASI', 'N', order='count').reset_index()); loc_counts.columns = ['LOKASI', 'FREQ']
+    return loc_counts.head(50)
+
+def vm_critical_tids(curr, prev, measure, prev_col, total_col, sort_week, slm_month):
+    weeks = ['W1', 'W2', 'W3', 'W4']
+    pivot_tid = cube_pivot(curr, ['TID', 'LOKASI', 'CABANG'], measure)
+    for w in weeks: 
+        if w not in pivot_tid.columns: pivot_tid[w] = 0
+    
+    if not prev.empty:
+        prev_counts = plain_keys(cube_counts(prev, 'TID', measure).reset_index())
+        prev_counts.columns = ['TID', prev_col] 
+    else: prev_counts = pd.DataFrame(columns=['TID', prev_col])
+        
+    merged = pd.merge(pivot_tid, prev_counts, on='TID', how='left').fillna(0)
+    merged[total_col] = merged[weeks].sum(axis=1)
+    sort_col = total_col if sort_week == 'All Week' else sort_week
+    
+    top_all_df = merged.sort_values(sort_col, ascending=False).reset_index(drop=True)
+    
+    cols_to_convert = [prev_col] + weeks + [total_col]
+    for c in cols_to_convert:
+        if c in top_all_df.columns: top_all_df[c] = top_all_df[c].astype(int)
+        
+    tids_view = top_all_df[['TID', 'LOKASI', 'CABANG'] + cols_to_convert].copy()
+    if slm_month is not None:
+        # TID bermasalah tanpa kunjungan SLM bulan ini (join ke hitungan index SLM)
+        tids_view['NO SLM'] = top_all_df['TID'].map(slm_month).isna()
+    return top_all_df, tids_view
+
+def vm_branch_trend(curr, prev, measure, prev_col, total_col, comp_mode):
+    weeks = ['W1', 'W2', 'W3', 'W4']
+    p_cab = cube_pivot(curr, 'CABANG', measure)
+    for w in weeks: 
+        if w not in p_cab.columns: p_cab[w] = 0
+    
+    if not prev.empty:
+        branch_prev = plain_keys(cube_counts(prev, 'CABANG', measure).reset_index())
+        branch_prev.columns = ['CABANG', prev_col] 
+    else: branch_prev = pd.DataFrame(columns=['CABANG', prev_col])
+        
+    merged_cab = pd.merge(p_cab, branch_prev, on='CABANG', how='left').fillna(0)
+    merged_cab[total_col] = merged_cab[weeks].sum(axis=1)
+    
+    top_5_cab_chart = merged_cab.sort_values(total_col, ascending=False).head(5)
+    top_all_cab_table = merged_cab.sort_values(total_col, ascending=False)
+    
+    week_pair = comp_mode.split(' vs ')
+    df_melt = top_5_cab_chart[['CABANG'] + week_pair].melt(id_vars='CABANG', var_name='Week', value_name='Total')
+
+    final_cols_cab = [prev_col] + weeks + [total_col]
+    top_cab_view = top_all_cab_table.copy()
+    for c in final_cols_cab: 
+        if c in top_cab_view.columns: top_cab_view[c] = top_cab_view[c].astype(int)
+    cols_to_show = ['CABANG'] + [c for c in final_cols_cab if c in top_cab_view.columns]
+    return {'chart': df_melt, 'table': top_cab_view[cols_to_show]}
+
+# --- STRUKTUR TURUNAN PER VERSI DATA (DIBANGUN REFRESHER atm_data, LIHAT get_snapshot) ---
+# Cube & index TID/SLM dibangun sekali per versi data oleh refresher, di luar jalur interaktif.
+def build_derived(data):
+    return {'cube': build_ticket_cube(data[0]), 'tid_index': build_tid_index(data[0]), 'slm_index': build_slm_index(data[1])}
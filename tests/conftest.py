@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import streamlit.logger
+import atm_data
+from atm_data.singleflight import get_flights
+
+streamlit.logger.set_log_level('error')  # cache_resource di luar `streamlit run` -> warning ScriptRunContext
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    # State sinkron master & daftar flight = cache_resource per proses -> kosongkan per test
+    for resource in (atm_data.get_master_sync_state, get_flights): resource.clear()
+    yield
+    for resource in (atm_data.get_master_sync_state, get_flights): resource.clear()
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from atm_data import single_flight, metrics
+from atm_data.singleflight import get_flights
+
+# =========================================================================
+# SINGLE-FLIGHT: FOLLOWER MEMAKAI HASIL / ERROR LEADER, LEADER TERHENTI -> HITUNG SENDIRI
+# =========================================================================
+# Leader ditahan di dalam fn sampai semua follower sudah menemukan flight-nya (follower dihitung
+# lewat metrics.inc role=follower, dipanggil setelah lookup -> wait() langsung lolos jika leader
+# sudah selesai, jadi tidak ada race).
+FOLLOWERS = 4
+
+class Stopped(BaseException):
+    # Seperti StopException / RerunException Streamlit: bukan Exception
+    pass
+
+@pytest.fixture
+def followers(monkeypatch):
+    joined = threading.Semaphore(0)
+    inc = metrics.inc
+    def spy(name, value=1, **labels):
+        if labels.get('role') == 'follower': joined.release()
+        return inc(name, value, **labels)
+    monkeypatch.setattr(metrics, 'inc', spy)
+    return joined
+
+def run_flight(followers, leader_fn, follower_fn):
+    # -> (hasil leader, [hasil follower]); hasil = ('ok', value) / ('error', exc)
+    entered, release = threading.Event(), threading.Event()
+    def leader_body():
+        entered.set()
+        assert release.wait(5)
+        return leader_fn()
+    def call(fn, out):
+        try: out.append(('ok', single_flight('k', fn, name='test')))
+        except BaseException as e: out.append(('error', e))
+
+    leader_out, follower_out = [], []
+    leader = threading.Thread(target=call, args=(leader_body, leader_out))
+    leader.start()
+    assert entered.wait(5)
+    threads = [threading.Thread(target=call, args=(follower_fn, follower_out)) for _ in range(FOLLOWERS)]
+    for t in threads: t.start()
+    for _ in range(FOLLOWERS): assert followers.acquire(timeout=5)
+    release.set()
+    for t in [leader] + threads: t.join(5)
+    assert not get_flights()['calls']  # flight selalu dilepas
+    return leader_out[0], follower_out
+
+def test_followers_share_leader_value(followers):
+    value = object()
+    follower_calls = []
+    leader, out = run_flight(followers, lambda: value, lambda: follower_calls.append(1))
+    assert leader == ('ok', value)
+    assert out == [('ok', value)] * FOLLOWERS
+    assert not follower_calls
+
+def test_leader_error_reaches_followers(followers):
+    error = ValueError('gagal')
+    def boom(): raise error
+    leader, out = run_flight(followers, boom, lambda: 'tidak dipanggil')
+    assert leader == ('error', error)
+    assert out == [('error', error)] * FOLLOWERS
+
+def test_abandoned_leader_followers_recompute(followers):
+    def stop(): raise Stopped()
+    follower_calls = []
+    def recompute():
+        follower_calls.append(1)
+        return 'sendiri'
+    leader, out = run_flight(followers, stop, recompute)
+    assert leader[0] == 'error' and isinstance(leader[1], Stopped)
+    assert out == [('ok', 'sendiri')] * FOLLOWERS
+    assert len(follower_calls) == FOLLOWERS
+
+def test_key_released_after_flight():
+    assert single_flight('k', lambda: 1) == 1
+    assert single_flight('k', lambda: 2) == 2
@@ -0,0 +1,123 @@
+import pandas as pd
+import pytest
+
+import atm_data
+from atm_data import SHEET_MAIN, clean_master, apply_master_schema, get_master_sync_state
+from atm_data.fixture import generate_book, FixtureClient, FixtureSpreadsheet, FixtureWorksheet
+from atm_data.loader import load_online
+from atm_data.config import MASTER_FULL_RESYNC_SEC
+from atm_data.disk_cache import seed_master_sync
+
+# =========================================================================
+# SINKRON INCREMENTAL MASTER (sync_master) LEWAT FixtureClient
+# =========================================================================
+# Tiap load dicek dua hal: jalur yang diambil (full = sheet utuh diminta di values_batch_get atau
+# fallback get_all_values setelah header/tail tidak cocok) dan hasilnya sama dengan full load dari grid.
+ROWS = 300
+
+@pytest.fixture
+def client(monkeypatch):
+    book = generate_book(ROWS, seed=7)
+    client = FixtureClient(book, {'growth': 0, 'latency': 0, 'quota_rate': 0, 'error_rate': 0, 'missing': []})
+    client.master_reads = []  # per load: range master di batch + 'get_all_values' jika fallback
+    batch_get, get_all = FixtureSpreadsheet.values_batch_get, FixtureWorksheet.get_all_values
+    def spy_batch(self, ranges, params=None):
+        self.client.master_reads.append([r for r in ranges if r.startswith(f"'{SHEET_MAIN}'")])
+        return batch_get(self, ranges, params)
+    def spy_all(self):
+        if self.title == SHEET_MAIN: self.client.master_reads[-1].append('get_all_values')
+        return get_all(self)
+    monkeypatch.setattr(FixtureSpreadsheet, 'values_batch_get', spy_batch)
+    monkeypatch.setattr(FixtureWorksheet, 'get_all_values', spy_all)
+    return client
+
+def last_mode(client):
+    reads = client.master_reads[-1]
+    return 'full' if reads == [f"'{SHEET_MAIN}'"] or 'get_all_values' in reads else 'incremental'
+
+def full_frame(grid):
+    return apply_master_schema(clean_master(pd.DataFrame(grid[1:], columns=grid[0])))
+
+def assert_same_as_full(df, grid):
+    # Kategori hasil append bisa beda urutan -> banding nilai, bukan dtype
+    plain = lambda f: f.astype({c: object for c in f.columns if isinstance(f[c].dtype, pd.CategoricalDtype)})
+    pd.testing.assert_frame_equal(plain(df), plain(full_frame(grid)), check_dtype=False)
+
+def test_append_new_rows(client):
+    load_online(client)
+    assert last_mode(client) == 'full'
+    client.opts['growth'] = 25
+    df = load_online(client)[0]
+    assert last_mode(client) == 'incremental'
+    assert len(df) == ROWS + 25
+    assert get_master_sync_state()['row_count'] == ROWS + 26
+    assert_same_as_full(df, client.book[SHEET_MAIN])
+
+def test_no_new_rows_keeps_frame(client):
+    df = load_online(client)[0]
+    again = load_online(client)[0]
+    assert last_mode(client) == 'incremental'
+    assert again is df
+
+def test_header_change_forces_full_reload(client):
+    load_online(client)
+    grid = client.book[SHEET_MAIN]
+    grid[0] = grid[0][:-1] + ['WAKTU INPUT']
+    client.opts['growth'] = 5
+    df = load_online(client)[0]
+    assert last_mode(client) == 'full'
+    assert 'WAKTU INPUT' in df.columns and 'WAKTU INSERT' not in df.columns
+    assert_same_as_full(df, grid)  # fixture menambah baris tiap baca master -> banding ke grid terakhir
+
+def test_shrunk_sheet_forces_full_reload(client):
+    load_online(client)
+    del client.book[SHEET_MAIN][-40:]  # tail A{n}: di luar grid -> range kosong
+    df = load_online(client)[0]
+    assert last_mode(client) == 'full'
+    assert len(df) == ROWS - 40
+    assert_same_as_full(df, client.book[SHEET_MAIN])
+
+def test_edited_last_row_forces_full_reload(client):
+    load_online(client)
+    grid = client.book[SHEET_MAIN]
+    grid[-1] = list(grid[-1])
+    grid[-1][grid[0].index('KATEGORI')] = 'Complain' if grid[-1][grid[0].index('KATEGORI')] != 'Complain' else 'Elastic'
+    client.opts['growth'] = 3
+    df = load_online(client)[0]
+    assert last_mode(client) == 'full'
+    assert_same_as_full(df, grid)
+
+def test_resync_deadline_passing_mid_fetch(client, monkeypatch):
+    # Batch sudah diminta sebagai header + tail, lalu batas full resync lewat sebelum sync_master
+    load_online(client)
+    batch_get = FixtureSpreadsheet.values_batch_get
+    def slow_fetch(self, ranges, params=None):
+        out = batch_get(self, ranges, params)
+        get_master_sync_state()['full_at'] -= MASTER_FULL_RESYNC_SEC + 1
+        return out
+    monkeypatch.setattr(FixtureSpreadsheet, 'values_batch_get', slow_fetch)
+    client.opts['growth'] = 4
+    df = load_online(client)[0]
+    assert len(df) == ROWS + 4
+    assert_same_as_full(df, client.book[SHEET_MAIN])
+    assert get_master_sync_state()['row_count'] == ROWS + 5
+
+    # Refresh berikutnya baru menjalankan full resync yang tertunda
+    monkeypatch.setattr(FixtureSpreadsheet, 'values_batch_get', batch_get)
+    df = load_online(client)[0]
+    assert client.master_reads[-1] == [f"'{SHEET_MAIN}'"]
+    assert_same_as_full(df, client.book[SHEET_MAIN])
+
+def test_warm_start_from_snapshot_manifest(client):
+    # Manifest snapshot menyimpan state sinkron (lihat disk_cache.write_snapshot_dir)
+    df = load_online(client)[0]
+    sync = get_master_sync_state()
+    manifest = {'master_sync': {k: sync[k] for k in ('header', 'header_hash', 'row_count', 'last_row', 'full_at')}}
+    atm_data.get_master_sync_state.clear()  # proses baru
+
+    seed_master_sync(manifest, df)
+    client.opts['growth'] = 10
+    df = load_online(client)[0]
+    assert last_mode(client) == 'incremental'
+    assert len(df) == ROWS + 10
+    assert_same_as_full(df, client.book[SHEET_MAIN])